@@ -0,0 +1,76 @@
+"""Compare full-frame and adaptive QR decoding over recorded frames.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_decode --frames recordings/
+
+Frames are replayed in order, so motion and static stretches in the recording
+exercise the adaptive decoder's ROI tracking and back-off. Success is the
+share of frames that returned a code, so frames the adaptive decoder skips
+count as misses.
+"""
+import argparse
+import time
+
+import zxingcpp
+
+from benchmarks.frames import load_frames
+from scanner_decode import AdaptiveDecoder
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run(decode, frames):
+    latencies = []
+    hits = 0
+    first_hit_ms = None
+    elapsed_ms = 0.0
+    for frame in frames:
+        start = time.perf_counter()
+        results = decode(frame)
+        latency = (time.perf_counter() - start) * 1e3
+        latencies.append(latency)
+        elapsed_ms += latency
+        if results:
+            hits += 1
+            if first_hit_ms is None:
+                first_hit_ms = elapsed_ms
+    latencies.sort()
+    return {
+        'p50': percentile(latencies, 0.50),
+        'p90': percentile(latencies, 0.90),
+        'p99': percentile(latencies, 0.99),
+        'mean': sum(latencies) / len(latencies),
+        'success': hits / len(frames),
+        'first_hit_ms': first_hit_ms,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', required=True, help="folder of images/.npy frames or a video file")
+    parser.add_argument('--limit', type=int)
+    parser.add_argument('--max-side', type=int, default=640, help="downscaled pass size")
+    args = parser.parse_args()
+
+    frames = load_frames(args.frames, args.limit)
+    adaptive = AdaptiveDecoder(max_side=args.max_side)
+    decoders = [('full-frame', zxingcpp.read_barcodes), ('adaptive', adaptive)]
+
+    print(f"{len(frames)} frames at {frames[0].shape[1]}x{frames[0].shape[0]} (latencies in ms)")
+    print(f"{'decoder':>10} {'p50':>7} {'p90':>7} {'p99':>7} {'mean':>7} {'success':>8} {'first hit':>10}")
+    for name, decode in decoders:
+        r = run(decode, frames)
+        first = f"{r['first_hit_ms']:.1f}" if r['first_hit_ms'] is not None else '-'
+        print(f"{name:>10} {r['p50']:>7.2f} {r['p90']:>7.2f} {r['p99']:>7.2f} {r['mean']:>7.2f} "
+              f"{r['success']:>8.1%} {first:>10}")
+    print(f"adaptive: {adaptive.stats()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""Compare batch password generation against the per-character path.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_passwords --count 20000
+"""
+import argparse
+import time
+
+import credentials
+
+
+def time_per_character(count, length):
+    start = time.perf_counter()
+    for _ in range(count):
+        credentials.generate_wpa3_password(length)
+    return time.perf_counter() - start
+
+
+def time_batch(count, length):
+    start = time.perf_counter()
+    credentials.generate_wpa3_passwords(count, length)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=20000)
+    parser.add_argument('--lengths', type=int, nargs='+', default=[8, 16, 32, 62, 63])
+    args = parser.parse_args()
+
+    print(f"{args.count} passwords per run, batch backend: {credentials.batch_backend()}")
+    print(f"{'length':>6} {'per-char/s':>12} {'batch/s':>12} {'speedup':>8}")
+    for length in args.lengths:
+        slow = time_per_character(args.count, length)
+        fast = time_batch(args.count, length)
+        print(f"{length:>6} {args.count / slow:>12,.0f} {args.count / fast:>12,.0f} {slow / fast:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
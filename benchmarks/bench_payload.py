@@ -0,0 +1,67 @@
+"""Round-trip check and throughput of the WIFI: payload codec.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_payload --count 1000000
+
+Random SSIDs and passwords are drawn from an alphabet rich in characters that
+need escaping. Every payload is decoded and compared with its source before
+anything is timed.
+"""
+import argparse
+import random
+import time
+
+from wifi_payload import encode_wifi_payload, parse_wifi_config, parse_wifi_configs
+
+ALPHABET = 'abcXYZ019 ;,:"\\\'📶🏠✨-_'
+AUTH_TYPES = ('WPA', 'WEP', 'nopass')
+
+
+def random_networks(count, seed):
+    rng = random.Random(seed)
+    networks = []
+    for _ in range(count):
+        auth = rng.choice(AUTH_TYPES)
+        ssid = ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(1, 16)))
+        password = None
+        if auth != 'nopass':
+            password = ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(8, 63)))
+        networks.append((ssid, password, auth, rng.random() < 0.2))
+    return networks
+
+
+def check_round_trip(networks, payloads):
+    for network, payload in zip(networks, payloads):
+        ssid, password, auth, hidden = network
+        expected = {'ssid': ssid, 'password': password, 'security_type': auth, 'hidden': hidden}
+        decoded = parse_wifi_config(payload)
+        if decoded != expected:
+            raise SystemExit(f"Round trip failed for {payload!r}: {decoded} != {expected}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=200000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    networks = random_networks(args.count, args.seed)
+
+    start = time.perf_counter()
+    payloads = [encode_wifi_payload(*network) for network in networks]
+    encode_time = time.perf_counter() - start
+
+    check_round_trip(networks, payloads)
+
+    start = time.perf_counter()
+    parse_wifi_configs(payloads)
+    decode_time = time.perf_counter() - start
+
+    print(f"{args.count} payloads round-tripped")
+    print(f"encode: {args.count / encode_time:>12,.0f} payloads/s")
+    print(f"decode: {args.count / decode_time:>12,.0f} payloads/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Measure allocation churn of the camera preview path on recorded frames.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_preview_alloc --frames recordings/
+    python -m benchmarks.bench_preview_alloc --synthetic 120
+"""
+import argparse
+import time
+import tracemalloc
+
+import cv2
+
+from benchmarks.frames import load_frames, synthetic_frames
+from scanner_pipeline import FramePool
+
+
+def legacy_preview(frame):
+    # VideoCapture.read() allocates a new array, then flip + tobytes copy it twice more
+    captured = frame.copy()
+    return cv2.flip(captured, 0).tobytes()
+
+
+def make_pooled_preview(pool):
+    def pooled_preview(frame):
+        # VideoCapture.read(buffer) fills a pooled buffer; the texture blits a flat view of it
+        pooled = pool.acquire()
+        pooled.array[...] = frame
+        view = pooled.array.reshape(-1)
+        pooled.release()
+        return view
+    return pooled_preview
+
+
+def measure(path, frames):
+    allocated = 0
+    tracemalloc.start()
+    start = time.perf_counter()
+    for frame in frames:
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        path(frame)
+        allocated += tracemalloc.get_traced_memory()[1] - before
+    elapsed = time.perf_counter() - start
+    tracemalloc.stop()
+    return allocated, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--frames', help="folder of images/.npy frames or a video file")
+    source.add_argument('--synthetic', type=int, metavar='N', help="use N random 1080p frames")
+    parser.add_argument('--limit', type=int, default=300)
+    parser.add_argument('--fps', type=float, default=30.0, help="frame rate used for MB/s figures")
+    args = parser.parse_args()
+
+    frames = load_frames(args.frames, args.limit) if args.frames else synthetic_frames(args.synthetic)
+    height, width = frames[0].shape[:2]
+    pool = FramePool(frames[0].shape, frames[0].dtype)
+    paths = [('legacy', legacy_preview), ('pooled', make_pooled_preview(pool))]
+
+    print(f"{len(frames)} frames at {width}x{height}")
+    print(f"{'path':>8} {'MB/frame':>10} {f'MB/s @{args.fps:g}fps':>14} {'ms/frame':>9}")
+    for name, path in paths:
+        allocated, elapsed = measure(path, frames)
+        per_frame = allocated / len(frames) / 1e6
+        print(f"{name:>8} {per_frame:>10.2f} {per_frame * args.fps:>14.1f} {elapsed / len(frames) * 1e3:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""Decode success and latency of QR encoding settings under blur and small sizes.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_scan_settings
+    python -m benchmarks.bench_scan_settings --levels L M --borders 1 2 4 \\
+        --module-pixels 2 3 4 --blur 0 1 2 --samples 30 --json scan.json
+
+Every setting is tried on the same sample of networks: random 3-emoji SSIDs
+with 62-character passwords. Each code is drawn at a fixed number of pixels
+per module on a cluttered background, so a thin quiet zone matters. It is
+then blurred with a Gaussian of the given sigma, given sensor noise, and
+decoded with zxingcpp. Smaller pixels per module stand in for a code seen
+from further away.
+"""
+import argparse
+import json
+import time
+
+import cv2
+import numpy as np
+import zxingcpp
+
+from metrics import LatencyWindow
+from qr_render import ERROR_CORRECTION_LEVELS, describe_matrix, qr_matrix
+from wifi_core import WiFiUtils
+from wifi_payload import encode_wifi_payload
+
+BACKGROUND_MARGIN = 48
+
+
+def draw_code(matrix, module_pixels, blur, rng):
+    code = np.where(np.array(matrix, dtype=bool), 0, 255).astype(np.uint8)
+    code = code.repeat(module_pixels, axis=0).repeat(module_pixels, axis=1)
+    side = code.shape[0] + 2 * BACKGROUND_MARGIN
+    # Blocky clutter right up to the quiet zone, like a card on a busy table
+    clutter = rng.integers(0, 256, (side // 8 + 1, side // 8 + 1), dtype=np.uint8)
+    frame = clutter.repeat(8, axis=0).repeat(8, axis=1)[:side, :side].copy()
+    frame[BACKGROUND_MARGIN:-BACKGROUND_MARGIN, BACKGROUND_MARGIN:-BACKGROUND_MARGIN] = code
+    if blur > 0:
+        frame = cv2.GaussianBlur(frame, (0, 0), blur)
+    noise = rng.normal(0, 6, frame.shape)
+    return np.clip(frame + noise, 0, 255).astype(np.uint8)
+
+
+def run_setting(networks, level, border, module_pixels, blur, seed):
+    rng = np.random.default_rng(seed)
+    latency = LatencyWindow(len(networks))
+    decoded = 0
+    versions = set()
+    for ssid, password in networks:
+        matrix = qr_matrix(ssid, password, 'WPA', False, level, border)
+        versions.add(describe_matrix(matrix, border)['version'])
+        frame = draw_code(matrix, module_pixels, blur, rng)
+        start = time.perf_counter()
+        results = zxingcpp.read_barcodes(frame, formats=zxingcpp.BarcodeFormat.QRCode)
+        latency.add((time.perf_counter() - start) * 1000)
+        expected = encode_wifi_payload(ssid, password)
+        decoded += any(result.text == expected for result in results)
+    summary = latency.summary()
+    return {
+        'error_correction': level,
+        'border': border,
+        'module_pixels': module_pixels,
+        'blur': blur,
+        'versions': sorted(versions),
+        'success_rate': decoded / len(networks),
+        'p50_ms': summary['p50_ms'],
+        'p95_ms': summary['p95_ms'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--levels', nargs='+', default=list(ERROR_CORRECTION_LEVELS),
+                        choices=list(ERROR_CORRECTION_LEVELS))
+    parser.add_argument('--borders', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--module-pixels', type=int, nargs='+', default=[2, 3, 4, 6])
+    parser.add_argument('--blur', type=float, nargs='+', default=[0, 1, 2])
+    parser.add_argument('--samples', type=int, default=20, help="networks per setting (default: 20)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', metavar='FILE', help="write every row as JSON")
+    args = parser.parse_args()
+
+    networks = [(WiFiUtils.generate_emoji_ssid(3), WiFiUtils.generate_wpa3_password(62))
+                for _ in range(args.samples)]
+    print(f"{args.samples} networks per setting")
+    print(f"{'ec':>2} {'border':>6} {'px':>3} {'blur':>4} {'version':>8} {'decoded':>8} "
+          f"{'p50 ms':>7} {'p95 ms':>7}")
+    rows = []
+    for level in args.levels:
+        for border in args.borders:
+            for module_pixels in args.module_pixels:
+                for blur in args.blur:
+                    row = run_setting(networks, level, border, module_pixels, blur, args.seed)
+                    rows.append(row)
+                    versions = '-'.join(str(v) for v in (row['versions'][0], row['versions'][-1]))
+                    print(f"{level:>2} {border:>6} {module_pixels:>3} {blur:>4g} {versions:>8} "
+                          f"{row['success_rate']:>8.0%} {row['p50_ms']:>7.2f} {row['p95_ms']:>7.2f}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""Import-time profile of the app's modules.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --target app --budget-ms 800
+
+Each target is imported in a fresh interpreter with -X importtime. The report
+lists the total import time and the slowest modules so that a heavy import
+creeping back onto the startup path is easy to spot.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The app module has a hyphen in its name, so it is loaded from its path
+TARGETS = {
+    'core': "import wifi_core",
+    'qr': "import qr_render",
+    'scanner': "import scanner_pipeline, scanner_decode",
+    'app': ("import importlib.util; "
+            "spec = importlib.util.spec_from_file_location('wifi_emoji', 'wifi-emoji.py'); "
+            "spec.loader.exec_module(importlib.util.module_from_spec(spec))"),
+}
+
+
+def profile_imports(code):
+    """Return {module: (self_us, cumulative_us, depth)} for one fresh interpreter"""
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules[name.strip()] = (int(self_us), int(cumulative_us), depth)
+    return modules
+
+
+def summarize(modules, top):
+    total_us = sum(cumulative for _, cumulative, depth in modules.values() if depth == 0)
+    slowest = sorted(modules.items(), key=lambda item: item[1][0], reverse=True)[:top]
+    return {
+        'total_ms': total_us / 1000,
+        'modules': len(modules),
+        'slowest': [{'module': name, 'self_ms': s / 1000, 'cumulative_ms': c / 1000}
+                    for name, (s, c, _) in slowest],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--target', choices=sorted(TARGETS), action='append',
+                        help="target to profile (default: all)")
+    parser.add_argument('--repeat', type=int, default=3, help="keep the fastest of N runs")
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--json', metavar='FILE', help="also write the report as JSON")
+    parser.add_argument('--budget-ms', type=float, help="exit non-zero if any target exceeds this")
+    args = parser.parse_args()
+
+    report = {}
+    for target in args.target or sorted(TARGETS):
+        try:
+            runs = [summarize(profile_imports(TARGETS[target]), args.top) for _ in range(args.repeat)]
+        except RuntimeError as e:
+            print(f"{target}: skipped ({e})")
+            continue
+        result = min(runs, key=lambda run: run['total_ms'])
+        report[target] = result
+        print(f"{target}: {result['total_ms']:.1f} ms across {result['modules']} modules")
+        for entry in result['slowest']:
+            print(f"    {entry['self_ms']:>8.1f} ms self {entry['cumulative_ms']:>9.1f} ms cum  {entry['module']}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.budget_ms is not None:
+        over = [t for t, r in report.items() if r['total_ms'] > args.budget_ms]
+        if over:
+            print(f"Over the {args.budget_ms:g} ms budget: {', '.join(over)}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
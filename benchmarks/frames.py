@@ -0,0 +1,39 @@
+import os
+
+import numpy as np
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.webp')
+
+
+def load_frames(path, limit=None):
+    """Load recorded BGR frames from a folder of images/.npy files or a video file"""
+    import cv2
+
+    frames = []
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            full = os.path.join(path, name)
+            if name.lower().endswith('.npy'):
+                frames.append(np.load(full))
+            elif name.lower().endswith(IMAGE_EXTENSIONS):
+                frame = cv2.imread(full, cv2.IMREAD_COLOR)
+                if frame is not None:
+                    frames.append(frame)
+            if limit and len(frames) >= limit:
+                break
+    else:
+        capture = cv2.VideoCapture(path)
+        while not limit or len(frames) < limit:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            frames.append(frame)
+        capture.release()
+    if not frames:
+        raise SystemExit(f"No frames found in {path}")
+    return frames
+
+
+def synthetic_frames(count, width=1920, height=1080, seed=0):
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 256, (height, width, 3), dtype=np.uint8) for _ in range(count)]
@@ -0,0 +1,167 @@
+"""Load test for provision_server against localhost.
+
+Run from the repository root:
+
+    python -m benchmarks.load_provision --spawn --duration 10 --concurrency 32
+    python -m benchmarks.load_provision --port 8080 --mix png,revalidate
+
+With --spawn a server is started on a free port, without history, and
+stopped afterwards. Each client keeps one HTTP/1.1 connection open and sends
+requests back to back, cycling through the mix:
+
+    credentials  GET /credentials
+    png          GET /qr.png for one of a few fixed networks (cache hits)
+    fresh        GET /qr.png for a network never seen before (renders)
+    svg          GET /qr.svg for one of the fixed networks
+    revalidate   GET /qr.png with If-None-Match (304, nothing rendered)
+    batch        GET /batch?count=50
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+from urllib.parse import urlencode
+
+from metrics import Metrics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXED_NETWORKS = [('📶🏠💻', 'correct-horse-battery-staple'), ('🚀✨', 'x' * 62), ('🔒', 'hunter22')]
+
+
+class Client:
+    def __init__(self, host, port, metrics, statuses):
+        self.host = host
+        self.port = port
+        self.metrics = metrics
+        self.statuses = statuses
+        self.reader = None
+        self.writer = None
+        self.etags = {}
+
+    async def request(self, path, headers=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        lines = [f'GET {path} HTTP/1.1', f'Host: {self.host}']
+        lines.extend(f'{name}: {value}' for name, value in (headers or {}).items())
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('utf-8'))
+        await self.writer.drain()
+
+        status = int((await self.reader.readline()).split()[1])
+        response_headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            response_headers[name.strip().lower()] = value.strip()
+        body = await self.reader.readexactly(int(response_headers.get('content-length', 0)))
+        if response_headers.get('connection', '').lower() == 'close':
+            self.close()
+        return status, response_headers, body
+
+    def close(self):
+        if self.writer:
+            self.writer.close()
+            self.writer = None
+
+    def path_for(self, kind, counter):
+        ssid, password = FIXED_NETWORKS[counter % len(FIXED_NETWORKS)]
+        if kind == 'credentials':
+            return '/credentials', None
+        if kind == 'batch':
+            return '/batch?count=50', None
+        if kind == 'fresh':
+            return '/qr.png?' + urlencode({'ssid': f'📶{os.getpid()}-{counter}-{id(self)}', 'password': password}), None
+        if kind == 'svg':
+            return '/qr.svg?' + urlencode({'ssid': ssid, 'password': password}), None
+        path = '/qr.png?' + urlencode({'ssid': ssid, 'password': password})
+        if kind == 'revalidate' and path in self.etags:
+            return path, {'If-None-Match': self.etags[path]}
+        return path, None
+
+    async def run(self, mix, deadline):
+        for counter, kind in enumerate(itertools.cycle(mix)):
+            if time.monotonic() >= deadline:
+                break
+            path, headers = self.path_for(kind, counter)
+            start = time.perf_counter()
+            status, response_headers, _ = await self.request(path, headers)
+            self.metrics.record(kind, (time.perf_counter() - start) * 1000)
+            self.statuses[kind, status] += 1
+            if 'etag' in response_headers:
+                self.etags[path] = response_headers['etag']
+        self.close()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def spawn_server(port, workers):
+    command = [sys.executable, 'provision_server.py', '--port', str(port), '--no-history']
+    if workers:
+        command += ['--workers', str(workers)]
+    process = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.PIPE, text=True)
+    # The server prints its address once it is listening
+    line = process.stdout.readline()
+    if not line.startswith('Serving'):
+        process.kill()
+        raise RuntimeError("provision_server did not start")
+    return process
+
+
+async def run_load(host, port, mix, concurrency, duration):
+    metrics = Metrics(samples=100_000)
+    statuses = Counter()
+    clients = [Client(host, port, metrics, statuses) for _ in range(concurrency)]
+    # Stagger the mix so the clients don't all request the same kind at once
+    mixes = [mix[i % len(mix):] + mix[:i % len(mix)] for i in range(concurrency)]
+    start = time.monotonic()
+    await asyncio.gather(*(c.run(m, start + duration) for c, m in zip(clients, mixes)))
+    return metrics, statuses, time.monotonic() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--spawn', action='store_true', help="start a server on a free port for the run")
+    parser.add_argument('--workers', type=int, help="render processes for a spawned server")
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10.0, help="seconds (default: 10)")
+    parser.add_argument('--mix', default='credentials,png,fresh,svg,revalidate',
+                        help="comma-separated request kinds to cycle through")
+    args = parser.parse_args()
+    mix = args.mix.split(',')
+
+    process = None
+    port = args.port
+    if args.spawn:
+        port = free_port()
+        process = spawn_server(port, args.workers)
+    try:
+        metrics, statuses, elapsed = asyncio.run(run_load(args.host, port, mix, args.concurrency, args.duration))
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+
+    total = sum(statuses.values())
+    print(f"{total} requests in {elapsed:.1f}s with {args.concurrency} connections: {total / elapsed:,.0f} req/s")
+    print(f"{'kind':<12} {'requests':>9} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8}  statuses")
+    for kind in dict.fromkeys(mix):
+        summary = metrics.latency(kind)
+        codes = ' '.join(f'{status}x{n}' for (k, status), n in sorted(statuses.items()) if k == kind)
+        print(f"{kind:<12} {summary['count']:>9} {summary['count'] / elapsed:>9,.0f} "
+              f"{summary['p50_ms']:>8.2f} {summary['p95_ms']:>8.2f}  {codes}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+"""Reproducible benchmark suite for the generator and scanner hot paths.
+
+Run from the repository root:
+
+    python -m benchmarks.suite --output bench.json
+    python -m benchmarks.suite --baseline bench.json --threshold 0.10
+
+Everything runs headless: no GPU, camera or display is needed. Cases whose
+optional dependencies are missing are reported as skipped. The startup/ cases
+are the import times from benchmarks.bench_startup. With --baseline,
+any case that got slower than the threshold fails the run.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import timeit
+
+from benchmarks.bench_startup import TARGETS as STARTUP_TARGETS, profile_imports, summarize
+from wifi_core import WiFiUtils
+from wifi_payload import parse_wifi_config
+
+PASSWORD_LENGTHS = (8, 16, 24, 32, 40, 48, 56, 63)
+QR_SIZES = (128, 288, 576, 1024)
+PAYLOADS = {
+    'standard': 'WIFI:T:WPA;S:📶 Home;P:correct-horse-battery-staple;;',
+    'samsung': 'WIFI:S:"📶 Home";P:"correct;horse";T:WPA;H:true;;',
+    'escaped': r'WIFI:T:WPA;S:a\;b\,c\:d;P:p\\w\"d\;x;;',
+}
+SEARCH_QUERIES = ('s', 'hea', 'red heart')
+DECODE_FRAME_SIZES = ((640, 480), (1280, 720), (1920, 1080))
+
+CASES = []
+
+
+def case(name):
+    """Register a factory that returns the zero-argument callable to time"""
+    def register(factory):
+        CASES.append((name, factory))
+        return factory
+    return register
+
+
+for _length in PASSWORD_LENGTHS:
+    case(f'password/{_length}')(lambda length=_length: lambda: WiFiUtils.generate_wpa3_password(length))
+
+for _size in QR_SIZES:
+    case(f'qr_png/{_size}')(lambda size=_size: lambda: WiFiUtils.generate_qr_code('📶', 'x' * 62, size))
+
+case('random_emoji')(lambda: WiFiUtils.get_random_emoji)
+
+for _query in SEARCH_QUERIES:
+    def _search_factory(query=_query):
+        from emoji_search import get_search_index
+
+        index = get_search_index()
+        # Time the uncached lookup a first keystroke pays
+        return lambda: (index.prefix_matches.cache_clear(), index.search(query))
+    case(f'emoji_search/{_query.replace(" ", "_")}')(_search_factory)
+
+for _name, _payload in PAYLOADS.items():
+    case(f'parse/{_name}')(lambda payload=_payload: lambda: parse_wifi_config(payload))
+
+
+def synthetic_qr_frame(width, height, module_pixels=6, seed=0):
+    """A noisy grey frame with a rendered WiFi QR code pasted in the middle"""
+    import numpy as np
+
+    from qr_render import qr_matrix
+
+    matrix = np.array(qr_matrix('📶 Bench', 'correct-horse-battery-staple'), dtype=bool)
+    code = np.where(matrix, 0, 255).astype(np.uint8)
+    code = code.repeat(module_pixels, axis=0).repeat(module_pixels, axis=1)
+    rng = np.random.default_rng(seed)
+    frame = rng.integers(90, 170, (height, width), dtype=np.uint8)
+    top = (height - code.shape[0]) // 2
+    left = (width - code.shape[1]) // 2
+    frame[top:top + code.shape[0], left:left + code.shape[1]] = code
+    return np.dstack([frame] * 3)
+
+
+for _width, _height in DECODE_FRAME_SIZES:
+    def _decode_factory(width=_width, height=_height):
+        import zxingcpp
+
+        frame = synthetic_qr_frame(width, height)
+        if not zxingcpp.read_barcodes(frame):
+            raise RuntimeError("synthetic frame did not decode")
+        return lambda: zxingcpp.read_barcodes(frame)
+    case(f'decode/{_width}x{_height}')(_decode_factory)
+
+
+def measure(function, repeat, min_time):
+    """Best per-call time over repeat runs, each at least min_time seconds long"""
+    timer = timeit.Timer(function)
+    number, elapsed = timer.autorange()
+    if elapsed < min_time:
+        number = max(number, int(number * min_time / max(elapsed, 1e-9)))
+    runs = timer.repeat(repeat=repeat, number=number)
+    return min(runs) / number, number
+
+
+def run_suite(selected, repeat, min_time):
+    results = {}
+    for name, factory in CASES:
+        if selected and not any(name.startswith(prefix) for prefix in selected):
+            continue
+        try:
+            function = factory()
+            # The warm-up call also fills any lazy caches before timing
+            function()
+        except (ImportError, RuntimeError) as e:
+            results[name] = {'skipped': str(e)}
+            print(f"{name:<24} skipped: {e}")
+            continue
+        per_call, number = measure(function, repeat, min_time)
+        results[name] = {'seconds': per_call, 'number': number}
+        print(f"{name:<24} {per_call * 1e6:>12.2f} us")
+
+    # Import time of each entry point, measured in fresh interpreters
+    for target, code in sorted(STARTUP_TARGETS.items()):
+        name = f'startup/{target}'
+        if selected and not any(name.startswith(prefix) for prefix in selected):
+            continue
+        try:
+            totals = [summarize(profile_imports(code), 0)['total_ms'] for _ in range(repeat)]
+        except RuntimeError as e:
+            results[name] = {'skipped': str(e)}
+            print(f"{name:<24} skipped: {e}")
+            continue
+        results[name] = {'seconds': min(totals) / 1000, 'number': 1}
+        print(f"{name:<24} {min(totals) * 1000:>12.2f} us")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Print the change per case and return the names that regressed"""
+    regressions = []
+    print(f"\n{'case':<24} {'baseline us':>12} {'current us':>12} {'change':>8}")
+    for name, result in results.items():
+        old = baseline.get(name, {})
+        if 'seconds' not in result or 'seconds' not in old:
+            continue
+        change = result['seconds'] / old['seconds'] - 1
+        flag = ''
+        if change > threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:<24} {old['seconds'] * 1e6:>12.2f} {result['seconds'] * 1e6:>12.2f} "
+              f"{change:>+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('cases', nargs='*', help="only run cases starting with these prefixes")
+    parser.add_argument('--output', metavar='FILE', help="write results as JSON")
+    parser.add_argument('--baseline', metavar='FILE', help="compare against an earlier JSON run")
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help="allowed slowdown before a case counts as a regression (default: 0.10)")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.2,
+                        help="minimum seconds per timed run (default: 0.2)")
+    parser.add_argument('--list', action='store_true', help="list cases and exit")
+    args = parser.parse_args()
+
+    if args.list:
+        for name, _ in CASES:
+            print(name)
+        for target in sorted(STARTUP_TARGETS):
+            print(f'startup/{target}')
+        return
+
+    results = run_suite(args.cases, args.repeat, args.min_time)
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
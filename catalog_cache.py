@@ -0,0 +1,298 @@
+"""Compiled emoji catalog.
+
+single.csv, combos.csv and the emoji package's table are compiled into one
+binary file that is memory-mapped at launch instead of being parsed. The file
+is a small JSON header followed by aligned sections:
+
+- typed arrays (codepoints, categories, UTF-8 byte lengths), read in place
+  through memoryview.cast;
+- string tables: an 'I' array of count + 1 offsets into a blob of UTF-8 bytes.
+
+The 'search' table lists the emoji the chooser can search, with the words
+(name, aliases, curated description) each one matches in 'search.keywords'.
+
+The header records the mtime, size and hash of every source. The file is
+rebuilt when any of them changes.
+
+    python catalog_cache.py            # rebuild if stale and print a summary
+    python catalog_cache.py --force
+"""
+import argparse
+import csv
+import hashlib
+import importlib.util
+import json
+import logging
+import mmap
+import os
+import struct
+from array import array
+
+from wifi_core import lazy_singleton
+
+MAGIC = b'EMOJICAT'
+FORMAT_VERSION = 2
+_HEADER = struct.Struct('<8sII')
+_ALIGN = 8
+
+log = logging.getLogger(__name__)
+
+
+def default_cache_path():
+    from wifi_core import data_dir
+    return os.path.join(data_dir(), 'emoji-catalog.bin')
+
+
+def _emoji_table_files():
+    """Data files of the installed emoji package, found without importing it"""
+    spec = importlib.util.find_spec('emoji')
+    if spec is None or not spec.submodule_search_locations:
+        return []
+    files = []
+    for location in spec.submodule_search_locations:
+        codes_dir = os.path.join(location, 'unicode_codes')
+        if os.path.isdir(codes_dir):
+            files.extend(os.path.join(codes_dir, name) for name in sorted(os.listdir(codes_dir))
+                         if name.endswith(('.py', '.json')))
+    return files
+
+
+def source_files():
+    from ssid_generator import COMBOS_CSV, SINGLE_CSV
+    return [SINGLE_CSV, COMBOS_CSV] + _emoji_table_files()
+
+
+def file_stamp(path, digest=None):
+    """mtime, size and content hash of one source; a missing file stamps as None"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    if digest is None:
+        with open(path, 'rb') as f:
+            digest = hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+    return {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'hash': digest}
+
+
+def is_stale(stamps, paths):
+    if set(stamps) != set(paths):
+        return True
+    for path in paths:
+        old = stamps[path]
+        try:
+            stat = os.stat(path)
+        except OSError:
+            if old is not None:
+                return True
+            continue
+        if old is None or (stat.st_mtime_ns, stat.st_size) != (old['mtime_ns'], old['size']):
+            return True
+        # Same mtime and size; the small CSVs are cheap enough to hash every time
+        if stat.st_size < 1 << 20 and file_stamp(path, None)['hash'] != old['hash']:
+            return True
+    return False
+
+
+class StringTable:
+    """Read-only sequence of strings stored as offsets into a UTF-8 blob"""
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return str(self.blob[self.offsets[index]:self.offsets[index + 1]], 'utf-8')
+
+    def __iter__(self):
+        return map(self.__getitem__, range(len(self)))
+
+    def byte_length(self, index):
+        return self.offsets[index + 1] - self.offsets[index]
+
+
+def _string_sections(strings):
+    offsets = array('I', [0])
+    blob = bytearray()
+    for text in strings:
+        blob += text.encode('utf-8')
+        offsets.append(len(blob))
+    return ('I', offsets.tobytes()), ('B', bytes(blob))
+
+
+def _read_pairs(path):
+    """(first, second) column pairs of a two-column CSV with a header row"""
+    if not os.path.exists(path):
+        return []
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = csv.reader(f)
+        next(rows, None)
+        return [(row[0].strip(), row[1].strip()) for row in rows if len(row) > 1 and row[0].strip()]
+
+
+def _description(data):
+    # ':antenna_bars:' -> 'antenna bars'
+    return data.get('en', '').strip(':').replace('_', ' ')
+
+
+def compile_sources():
+    """Read every source once and return the sections of the catalog file"""
+    import emoji
+
+    from emoji_catalog import EmojiCatalog
+    from ssid_generator import COMBOS_CSV, SINGLE_CSV, SSIDIndex, load_emoji_sequences
+
+    single_rows = _read_pairs(SINGLE_CSV)
+    combo_rows = [(name, combo) for name, combo in _read_pairs(COMBOS_CSV) if combo]
+    curated = {e: description for e, description in single_rows if description}
+
+    def describe(sequence):
+        if sequence in curated:
+            return curated[sequence]
+        return _description(emoji.EMOJI_DATA.get(sequence, {}))
+
+    def keywords(sequence):
+        # Everything the chooser search matches on: name, aliases and curated text
+        data = emoji.EMOJI_DATA.get(sequence, {})
+        words = [_description(data), curated.get(sequence, '')]
+        words.extend(alias.strip(':').replace('_', ' ') for alias in data.get('alias', ()))
+        return ' '.join(w for w in words if w)
+
+    singles = EmojiCatalog.from_emoji_data()
+    index = SSIDIndex(load_emoji_sequences())
+    single_set = set(singles)
+    # Searchable entries: the chooser's catalog, then curated picks it doesn't hold
+    searchable = list(singles) + [e for e, _ in single_rows if e not in single_set]
+
+    sections = {
+        'single.codepoints': ('I', singles.codepoints.tobytes()),
+        'single.categories': ('B', singles.categories.tobytes()),
+        'sequences.byte_lengths': ('B', index.byte_lengths.tobytes()),
+    }
+    for name, strings in (
+        ('single.descriptions', [describe(e) for e in singles]),
+        ('search', searchable),
+        ('search.keywords', [keywords(e) for e in searchable]),
+        ('sequences', index.sequences),
+        ('sequences.descriptions', [describe(s) for s in index.sequences]),
+        ('picks', [e for e, _ in single_rows]),
+        ('picks.descriptions', [description for _, description in single_rows]),
+        ('combos', [combo for _, combo in combo_rows]),
+        ('combos.names', [name for name, _ in combo_rows]),
+    ):
+        offsets, blob = _string_sections(strings)
+        sections[name + '.offsets'] = offsets
+        sections[name + '.blob'] = blob
+    return sections
+
+
+def serialize(sections, stamps):
+    """Yield the header and the aligned sections as byte strings"""
+    layout = {}
+    position = 0
+    for name, (typecode, data) in sections.items():
+        layout[name] = [typecode, position, len(data)]
+        position += len(data) + (-len(data) % _ALIGN)
+    header = json.dumps({'sources': stamps, 'sections': layout}).encode('utf-8')
+    header += b' ' * (-(len(header) + _HEADER.size) % _ALIGN)
+    yield _HEADER.pack(MAGIC, FORMAT_VERSION, len(header))
+    yield header
+    for typecode, data in sections.values():
+        yield data
+        yield b'\0' * (-len(data) % _ALIGN)
+
+
+def write_catalog(path, sections, stamps):
+    """Write the catalog next to path and move it into place atomically"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.writelines(serialize(sections, stamps))
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+class CompiledCatalog:
+    """Memory-mapped view of a catalog file; sections are read in place"""
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        view = memoryview(buffer)
+        magic, version, header_size = _HEADER.unpack_from(view)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError("Not a compatible emoji catalog file")
+        header = json.loads(bytes(view[_HEADER.size:_HEADER.size + header_size]))
+        self.sources = header['sources']
+        self._data = view[_HEADER.size + header_size:]
+        self._sections = header['sections']
+
+    @classmethod
+    def open(cls, path):
+        with open(path, 'rb') as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def array(self, name):
+        typecode, offset, size = self._sections[name]
+        return self._data[offset:offset + size].cast(typecode)
+
+    def strings(self, name):
+        return StringTable(self.array(name + '.offsets'), self.array(name + '.blob'))
+
+
+def load_catalog(path=None, force=False):
+    """Open the compiled catalog, rebuilding it first if any source changed"""
+    path = path or default_cache_path()
+    paths = source_files()
+    if not force:
+        try:
+            catalog = CompiledCatalog.open(path)
+        except (OSError, ValueError):
+            pass
+        else:
+            if not is_stale(catalog.sources, paths):
+                return catalog
+
+    sections = compile_sources()
+    stamps = {p: file_stamp(p) for p in paths}
+    try:
+        write_catalog(path, sections, stamps)
+        return CompiledCatalog.open(path)
+    except OSError as e:
+        # A read-only home still gets a working catalog, just not a cached one
+        log.warning("Could not write emoji catalog cache %s: %s", path, e)
+        return CompiledCatalog(b''.join(serialize(sections, stamps)))
+
+
+@lazy_singleton
+def get_compiled_catalog():
+    """The catalog from the default cache path, shared by the app and the CLI tools"""
+    return load_catalog()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile the emoji catalog cache.")
+    parser.add_argument('--path', help="cache file (default: in the app data directory)")
+    parser.add_argument('--force', action='store_true', help="rebuild even if the sources are unchanged")
+    args = parser.parse_args()
+
+    path = args.path or default_cache_path()
+    catalog = load_catalog(path, args.force)
+    print(f"{path}: {len(catalog.buffer):,} bytes, "
+          f"{len(catalog.array('single.codepoints'))} single emoji, "
+          f"{len(catalog.strings('sequences'))} sequences, "
+          f"{len(catalog.strings('combos'))} combos")
+
+
+if __name__ == '__main__':
+    main()
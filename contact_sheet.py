@@ -0,0 +1,273 @@
+"""Printable WiFi card sheets.
+
+    python contact_sheet.py combos.csv -o cards.pdf
+    python contact_sheet.py networks.jsonl -o sheets/ --paper letter --cols 4 --rows 5
+
+Networks are read like generate_wifi_qrcode.py --batch reads them, and missing
+passwords are generated. Each page is one NumPy RGB array: QR modules are
+scaled with repeat() and written into their cell by slice assignment, and
+labels are alpha-blended the same way. Pages are written one at a time,
+appended to the PDF or saved as page-NNNN.png, so memory stays flat for any
+number of cards.
+"""
+import argparse
+import itertools
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+import credentials
+from emoji_fonts import GlyphAtlas, probe_font, resolve_emoji_font
+from generate_wifi_qrcode import read_networks
+from qr_render import DEFAULT_BORDER, DEFAULT_ERROR_CORRECTION, ERROR_CORRECTION_LEVELS, qr_matrix
+
+PAPER_SIZES_MM = {
+    'a4': (210.0, 297.0),
+    'a5': (148.0, 210.0),
+    'letter': (215.9, 279.4),
+}
+
+CUT_LINE_GREY = 200
+
+log = logging.getLogger('contact_sheet')
+
+
+def mm_to_pixels(mm, dpi):
+    return round(mm / 25.4 * dpi)
+
+
+class SheetLayout:
+    """Page size in pixels and the grid of card cells on it"""
+
+    def __init__(self, paper='a4', dpi=300, cols=3, rows=4, margin_mm=10, show_password=True):
+        width_mm, height_mm = PAPER_SIZES_MM[paper]
+        self.dpi = dpi
+        self.cols = cols
+        self.rows = rows
+        self.width = mm_to_pixels(width_mm, dpi)
+        self.height = mm_to_pixels(height_mm, dpi)
+        self.margin = mm_to_pixels(margin_mm, dpi)
+        self.cell_width = (self.width - 2 * self.margin) // cols
+        self.cell_height = (self.height - 2 * self.margin) // rows
+        if self.cell_width < 64 or self.cell_height < 64:
+            raise ValueError(f"{cols}x{rows} cards don't fit on {paper} at {dpi} dpi")
+        self.padding = max(4, min(self.cell_width, self.cell_height) // 16)
+        self.label_height = self.cell_height // 8
+        self.password_height = self.cell_height // 18 if show_password else 0
+
+    @property
+    def per_page(self):
+        return self.cols * self.rows
+
+    def cell_origin(self, slot):
+        row, col = divmod(slot, self.cols)
+        return self.margin + row * self.cell_height, self.margin + col * self.cell_width
+
+    def qr_box(self):
+        """Largest square left for the QR code once the text lines are reserved"""
+        text = self.label_height + self.password_height
+        return min(self.cell_width, self.cell_height - text) - 2 * self.padding
+
+
+class LabelRenderer:
+    """Draw single-line labels into RGBA arrays, caching fonts and finished labels.
+
+    SSID labels come from a GlyphAtlas in the emoji font, so an SSID that
+    appears on many cards is rasterized once per line height.
+    """
+
+    def __init__(self, emoji_font=None):
+        if emoji_font:
+            strikes = probe_font(emoji_font)
+            self.emoji = GlyphAtlas(emoji_font if strikes is not None else None, strikes or (), max_pages=4)
+        else:
+            self.emoji = GlyphAtlas(*resolve_emoji_font(), max_pages=4)
+        self.font = lru_cache(maxsize=32)(ImageFont.load_default)
+        self.render = lru_cache(maxsize=4096)(self._render)
+
+    def _render(self, text, max_width, height, emoji=True):
+        target = max(8, int(height * 0.8))
+        if emoji:
+            label = self.emoji.pixels(self.emoji.region(text, target))
+        else:
+            font = self.font(target)
+            left, top, right, bottom = font.getbbox(text)
+            image = Image.new('RGBA', (max(1, right - left), max(1, bottom - top)), (255, 255, 255, 0))
+            ImageDraw.Draw(image).text((-left, -top), text, font=font, fill=(0, 0, 0, 255))
+            label = np.asarray(image)
+        # Scale anything too wide down to the cell
+        label_height, label_width = label.shape[:2]
+        scale = max_width / label_width
+        if scale < 1:
+            size = (max(1, round(label_width * scale)), max(1, round(label_height * scale)))
+            label = np.asarray(Image.fromarray(label, 'RGBA').resize(size, Image.Resampling.LANCZOS))
+        elif emoji:
+            # The atlas page may be cleared while this label is still cached
+            label = label.copy()
+        return label
+
+
+def blend(page, top, left, rgba):
+    """Alpha-blend an RGBA array onto the RGB page in place"""
+    height, width = rgba.shape[:2]
+    region = page[top:top + height, left:left + width]
+    alpha = rgba[..., 3:4].astype(np.uint16)
+    mixed = rgba[..., :3] * alpha + region * (255 - alpha)
+    region[...] = (mixed + 127) // 255
+
+
+def network_matrix(network, error_correction=DEFAULT_ERROR_CORRECTION, border=DEFAULT_BORDER):
+    """Module matrix of one card as a bool array, or the error message if it can't be
+    encoded; picklable for worker processes"""
+    try:
+        return np.array(qr_matrix(network['ssid'], network['password'], network['authentication_type'],
+                                  network['hidden'], error_correction, border), dtype=bool)
+    except Exception as e:
+        return f'{type(e).__name__}: {e}'
+
+
+def with_passwords(networks):
+    for network in networks:
+        if not network['password'] and network['authentication_type'] != 'nopass':
+            network = dict(network, password=credentials.generate_wpa3_password())
+        yield network
+
+
+class SheetRenderer:
+    def __init__(self, layout, labels=None, cut_lines=True,
+                 error_correction=DEFAULT_ERROR_CORRECTION, border=DEFAULT_BORDER):
+        self.layout = layout
+        self.encode = partial(network_matrix, error_correction=error_correction, border=border)
+        self.labels = labels or LabelRenderer()
+        self.cut_lines = cut_lines
+        # (row index, network, error) for every row left off the sheets
+        self.failed = []
+        # One page buffer, cleared and refilled for every page
+        self.page = np.empty((layout.height, layout.width, 3), dtype=np.uint8)
+
+    def draw_card(self, slot, network, matrix):
+        layout = self.layout
+        page = self.page
+        top, left = layout.cell_origin(slot)
+
+        modules = matrix.shape[0]
+        scale = max(1, layout.qr_box() // modules)
+        side = modules * scale
+        qr_top = top + layout.padding
+        qr_left = left + (layout.cell_width - side) // 2
+        code = np.where(matrix, 0, 255).astype(np.uint8)
+        page[qr_top:qr_top + side, qr_left:qr_left + side] = code.repeat(scale, 0).repeat(scale, 1)[..., None]
+
+        text_width = layout.cell_width - 2 * layout.padding
+        line_top = qr_top + side + layout.padding // 2
+        for text, height, emoji in (
+            (network['ssid'], layout.label_height, True),
+            (network['password'] or '', layout.password_height, False),
+        ):
+            if not height or not text:
+                continue
+            label = self.labels.render(text, text_width, height, emoji)
+            blend(page, line_top + (height - label.shape[0]) // 2,
+                  left + (layout.cell_width - label.shape[1]) // 2, label)
+            line_top += height
+
+    def draw_cut_lines(self):
+        layout = self.layout
+        bottom = layout.margin + layout.rows * layout.cell_height
+        right = layout.margin + layout.cols * layout.cell_width
+        for row in range(layout.rows + 1):
+            y = layout.margin + row * layout.cell_height
+            self.page[y, layout.margin:right + 1] = CUT_LINE_GREY
+        for col in range(layout.cols + 1):
+            x = layout.margin + col * layout.cell_width
+            self.page[layout.margin:bottom + 1, x] = CUT_LINE_GREY
+
+    def pages(self, networks, matrices=None):
+        """Yield the shared page buffer once per filled page.
+
+        matrices maps a list of networks to their module matrices (map() by
+        default, or a process pool's map). The buffer is reused, so each page
+        must be written out before the next is requested.
+        """
+        matrices = matrices or map
+        rows = enumerate(networks)
+        while True:
+            batch = list(itertools.islice(rows, self.layout.per_page))
+            if not batch:
+                return
+            cards = []
+            for (index, network), matrix in zip(batch, matrices(self.encode, [n for _, n in batch])):
+                if isinstance(matrix, str):
+                    # A row that can't be encoded is reported and skipped, not fatal
+                    log.error("Row %d (%r) skipped: %s", index, network['ssid'][:40], matrix)
+                    self.failed.append((index, network, matrix))
+                else:
+                    cards.append((network, matrix))
+            if not cards:
+                continue
+            self.page.fill(255)
+            if self.cut_lines:
+                self.draw_cut_lines()
+            for slot, (network, matrix) in enumerate(cards):
+                self.draw_card(slot, network, matrix)
+            yield self.page
+
+
+def write_pages(pages, output, dpi, quality=95):
+    """Append each page to a PDF, or save it as <output>/page-NNNN.png; returns the page count"""
+    count = 0
+    is_pdf = output.lower().endswith('.pdf')
+    if not is_pdf:
+        os.makedirs(output, exist_ok=True)
+    for count, page in enumerate(pages, 1):
+        image = Image.fromarray(page, 'RGB')
+        if is_pdf:
+            # append=True adds a page to the file on disk instead of holding every page in memory
+            image.save(output, 'PDF', resolution=dpi, quality=quality, append=count > 1)
+        else:
+            image.save(os.path.join(output, f'page-{count:04d}.png'), dpi=(dpi, dpi))
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render WiFi cards onto printable pages.")
+    parser.add_argument('input', help="CSV or JSONL list of networks")
+    parser.add_argument('-o', '--output', default='cards.pdf',
+                        help="PDF file, or a directory for PNG pages (default: cards.pdf)")
+    parser.add_argument('--paper', choices=sorted(PAPER_SIZES_MM), default='a4')
+    parser.add_argument('--dpi', type=int, default=300)
+    parser.add_argument('--cols', type=int, default=3)
+    parser.add_argument('--rows', type=int, default=4)
+    parser.add_argument('--margin-mm', type=float, default=10)
+    parser.add_argument('--no-password', action='store_true', help="leave the password line off the cards")
+    parser.add_argument('--no-cut-lines', action='store_true')
+    parser.add_argument('--font', help="emoji font for the SSID labels")
+    parser.add_argument('--error-correction', choices=sorted(ERROR_CORRECTION_LEVELS),
+                        default=DEFAULT_ERROR_CORRECTION)
+    parser.add_argument('--border', type=int, default=DEFAULT_BORDER, help="quiet zone in modules")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="processes for QR encoding (default: 1)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING, format='%(levelname)s %(name)s: %(message)s')
+
+    layout = SheetLayout(args.paper, args.dpi, args.cols, args.rows, args.margin_mm, not args.no_password)
+    renderer = SheetRenderer(layout, LabelRenderer(args.font), not args.no_cut_lines,
+                             args.error_correction, args.border)
+    networks = with_passwords(read_networks(args.input))
+
+    if args.workers > 1:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            count = write_pages(renderer.pages(networks, pool.map), args.output, args.dpi)
+    else:
+        count = write_pages(renderer.pages(networks), args.output, args.dpi)
+    print(f"Wrote {count} page(s) of {layout.cols}x{layout.rows} cards to {args.output}")
+    if renderer.failed:
+        print(f"Skipped {len(renderer.failed)} row(s) that could not be encoded.")
+
+
+if __name__ == '__main__':
+    main()
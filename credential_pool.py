@@ -0,0 +1,111 @@
+import logging
+import threading
+import time
+from collections import deque
+
+from metrics import METRICS
+
+log = logging.getLogger('credential_pool')
+
+
+class CredentialPool:
+    """A bounded pool of ready-made credentials, refilled by a background thread.
+
+    Entries are made by produce(key), where key holds every setting an entry
+    depends on (for the app: SSID, password length, QR size and encoding). The
+    pool only ever holds entries for one key; asking for a different key drops
+    them and starts refilling for the new one. take() never waits: an empty
+    pool is a miss and the caller makes the entry itself.
+
+    Hits and misses are counted in METRICS as <name>_hit and <name>_miss.
+    """
+
+    def __init__(self, produce, capacity=4, name='credential_pool', retry_delay=1.0):
+        self.produce = produce
+        self.capacity = capacity
+        self.name = name
+        self.retry_delay = retry_delay
+        self._condition = threading.Condition()
+        self._entries = deque()
+        self._key = None
+        self._generation = 0
+        self._closed = False
+        self._thread = None
+        self.hits = 0
+        self.misses = 0
+        self.produced = 0
+        self.discarded = 0
+
+    def prepare(self, key):
+        """Fill the pool for key, dropping entries made for any other key"""
+        with self._condition:
+            if self._closed:
+                return
+            if key != self._key:
+                self.discarded += len(self._entries)
+                self._entries.clear()
+                self._key = key
+                # Entries still being made for the old key are discarded when they finish
+                self._generation += 1
+                self._condition.notify_all()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._fill, name=self.name, daemon=True)
+                self._thread.start()
+
+    def take(self, key):
+        """Pop an entry made for key, or return None on a miss"""
+        with self._condition:
+            if key == self._key and self._entries:
+                entry = self._entries.popleft()
+                self.hits += 1
+                self._condition.notify_all()
+            else:
+                entry = None
+                self.misses += 1
+        METRICS.increment(f'{self.name}_hit' if entry is not None else f'{self.name}_miss')
+        if entry is None:
+            self.prepare(key)
+        return entry
+
+    def close(self, timeout=1.0):
+        with self._condition:
+            self._closed = True
+            self._entries.clear()
+            self._condition.notify_all()
+            thread, self._thread = self._thread, None
+        if thread:
+            thread.join(timeout)
+
+    def stats(self):
+        with self._condition:
+            lookups = self.hits + self.misses
+            return {
+                'ready': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'produced': self.produced,
+                'discarded': self.discarded,
+            }
+
+    def _fill(self):
+        while True:
+            with self._condition:
+                while not self._closed and len(self._entries) >= self.capacity:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                key, generation = self._key, self._generation
+            try:
+                with METRICS.timer(f'{self.name}_fill'):
+                    entry = self.produce(key)
+            except Exception as e:
+                log.exception("Error filling credential pool: %s", e)
+                time.sleep(self.retry_delay)
+                continue
+            with self._condition:
+                if generation == self._generation and not self._closed:
+                    self._entries.append(entry)
+                    self.produced += 1
+                else:
+                    self.discarded += 1
@@ -0,0 +1,133 @@
+import math
+import os
+import secrets
+import string
+
+# NumPy is optional and only loaded by the first batch call
+np = None
+
+MIN_PASSWORD_LENGTH = 8
+MAX_PASSWORD_LENGTH = 63
+
+SPECIAL_CHARS = "!@$%^&*()-_=+[]{}|,.<>?`~"
+CHAR_SETS = (string.ascii_lowercase, string.ascii_uppercase, string.digits, SPECIAL_CHARS)
+ALPHABET = ''.join(CHAR_SETS)
+ALL_CLASSES = (1 << len(CHAR_SETS)) - 1
+
+# Bytes at or above this value are rejected so that byte % len(ALPHABET) stays unbiased
+_BYTE_LIMIT = 256 - 256 % len(ALPHABET)
+
+# bytes.translate() maps each accepted random byte straight to its alphabet character
+_TRANSLATE_TABLE = bytes(ord(ALPHABET[b % len(ALPHABET)]) if b < _BYTE_LIMIT else 0 for b in range(256))
+_REJECTED_BYTES = bytes(range(_BYTE_LIMIT, 256))
+
+_CLASS_BITS = [0] * 128
+for _bit, _chars in enumerate(CHAR_SETS):
+    for _c in _chars:
+        _CLASS_BITS[ord(_c)] = 1 << _bit
+_CLASS_SETS = tuple(frozenset(s) for s in CHAR_SETS)
+
+
+def check_length(length):
+    if length < MIN_PASSWORD_LENGTH or length > MAX_PASSWORD_LENGTH:
+        raise ValueError("Password must be 8-63 characters")
+
+
+def generate_wpa3_password(length=62):
+    """Per-character password: one secrets.choice call per character"""
+    check_length(length)
+
+    while True:
+        password = [secrets.choice(s) for s in CHAR_SETS]
+        remaining = length - len(password)
+        password.extend(secrets.choice(ALPHABET) for _ in range(remaining))
+        secrets.SystemRandom().shuffle(password)
+        password = ''.join(password)
+
+        # Validation checks
+        has_lower = any(c.islower() for c in password)
+        has_upper = any(c.isupper() for c in password)
+        has_digit = any(c.isdigit() for c in password)
+        has_special = any(not c.isalnum() for c in password)
+
+        if has_lower and has_upper and has_digit and has_special:
+            return password
+
+
+def coverage_probability(length):
+    """Chance that a uniform password of this length contains every character class"""
+    total = len(ALPHABET)
+    probability = 0.0
+    # Inclusion-exclusion over the classes that could be missing
+    for mask in range(1 << len(CHAR_SETS)):
+        missing = sum(len(s) for bit, s in enumerate(CHAR_SETS) if mask & (1 << bit))
+        sign = -1 if bin(mask).count('1') % 2 else 1
+        probability += sign * ((total - missing) / total) ** length
+    return probability
+
+
+def _random_alphabet_bytes(count):
+    data = os.urandom(count)
+    return data.translate(_TRANSLATE_TABLE, _REJECTED_BYTES)
+
+
+def _covered_rows_numpy(chars, length):
+    rows = np.frombuffer(chars, dtype=np.uint8)[:len(chars) // length * length].reshape(-1, length)
+    masks = np.bitwise_or.reduce(_CLASS_BITS_ARRAY[rows], axis=1)
+    return rows[masks == ALL_CLASSES].tobytes().decode('ascii')
+
+
+def _covered_rows_python(chars, length):
+    text = chars.decode('ascii')
+    rows = []
+    for start in range(0, len(text) - length + 1, length):
+        row = text[start:start + length]
+        seen = set(row)
+        if all(not seen.isdisjoint(s) for s in _CLASS_SETS):
+            rows.append(row)
+    return ''.join(rows)
+
+
+_covered_rows = None
+
+
+def _batch_row_filter():
+    global np, _CLASS_BITS_ARRAY, _covered_rows
+    if _covered_rows is None:
+        try:
+            import numpy
+        except ImportError:
+            _covered_rows = _covered_rows_python
+        else:
+            np = numpy
+            _CLASS_BITS_ARRAY = np.array(_CLASS_BITS, dtype=np.uint8)
+            _covered_rows = _covered_rows_numpy
+    return _covered_rows
+
+
+def batch_backend():
+    return 'numpy' if _batch_row_filter() is _covered_rows_numpy else 'pure python'
+
+
+def generate_wpa3_passwords(count, length=62):
+    """Generate count passwords from large blocks of OS randomness.
+
+    Random bytes are mapped onto the alphabet with rejection sampling, cut into
+    rows and every row missing a character class is discarded, so each password
+    is uniform over all passwords that satisfy the class-coverage rule.
+    """
+    check_length(length)
+    if count < 0:
+        raise ValueError("count must not be negative")
+
+    covered_rows = _batch_row_filter()
+    acceptance = coverage_probability(length) * _BYTE_LIMIT / 256
+    passwords = []
+    while len(passwords) < count:
+        needed = count - len(passwords)
+        # Oversample a little so that one block is almost always enough
+        block = math.ceil(needed * length / acceptance * 1.05) + length * 4
+        text = covered_rows(_random_alphabet_bytes(block), length)
+        passwords.extend(text[i:i + length] for i in range(0, len(text), length))
+    del passwords[count:]
+    return passwords
@@ -0,0 +1,88 @@
+import secrets
+from array import array
+
+from wifi_core import lazy_singleton
+
+FALLBACK_EMOJI = "📶"
+
+# Combining marks that show up as single-codepoint keys in emoji.EMOJI_DATA
+EXCLUDED_CODEPOINTS = frozenset((0xFE0F, 0x20E3))
+
+# Unicode blocks used to group the single-codepoint emoji
+CATEGORIES = (
+    ('Other', 0x0000, 0x0000),
+    ('Enclosed Alphanumerics', 0x1F100, 0x1F1FF),
+    ('Symbols & Pictographs', 0x1F300, 0x1F5FF),
+    ('Emoticons', 0x1F600, 0x1F64F),
+    ('Transport & Map', 0x1F680, 0x1F6FF),
+    ('Supplemental Symbols', 0x1F900, 0x1F9FF),
+    ('Symbols & Pictographs Ext-A', 0x1FA70, 0x1FAFF),
+    ('Miscellaneous Symbols', 0x2600, 0x26FF),
+    ('Dingbats', 0x2700, 0x27BF),
+)
+
+
+def category_index(codepoint):
+    for index, (_, start, end) in enumerate(CATEGORIES[1:], 1):
+        if start <= codepoint <= end:
+            return index
+    return 0
+
+
+class EmojiCatalog:
+    """Compact, immutable table of the emoji the app can pick from"""
+
+    def __init__(self, codepoints, categories=None, descriptions=None):
+        self.codepoints = array('I', codepoints)
+        self.byte_lengths = array('B', (len(chr(cp).encode('utf-8')) for cp in self.codepoints))
+        if categories is None:
+            categories = array('B', (category_index(cp) for cp in self.codepoints))
+        self.categories = categories
+        self.descriptions = descriptions
+
+    @classmethod
+    def from_emoji_data(cls):
+        import emoji
+        codepoints = sorted(
+            ord(c) for c in emoji.EMOJI_DATA
+            if len(c) == 1 and ord(c) not in EXCLUDED_CODEPOINTS
+        )
+        return cls(codepoints)
+
+    @classmethod
+    def from_compiled(cls, compiled):
+        """Build from a catalog_cache.CompiledCatalog without touching the emoji package"""
+        return cls(
+            compiled.array('single.codepoints'),
+            compiled.array('single.categories'),
+            compiled.strings('single.descriptions'),
+        )
+
+    def __len__(self):
+        return len(self.codepoints)
+
+    def __getitem__(self, index):
+        return chr(self.codepoints[index])
+
+    def __iter__(self):
+        return map(chr, self.codepoints)
+
+    def byte_length(self, index):
+        return self.byte_lengths[index]
+
+    def category(self, index):
+        return CATEGORIES[self.categories[index]][0]
+
+    def description(self, index):
+        return self.descriptions[index] if self.descriptions is not None else ''
+
+    def random_emoji(self):
+        if not self.codepoints:
+            return FALLBACK_EMOJI
+        return chr(self.codepoints[secrets.randbelow(len(self.codepoints))])
+
+
+@lazy_singleton
+def get_catalog():
+    from catalog_cache import get_compiled_catalog
+    return EmojiCatalog.from_compiled(get_compiled_catalog())
@@ -0,0 +1,277 @@
+"""Emoji font lookup and a shared atlas of rasterized emoji.
+
+The first usable emoji font is found once and remembered in
+~/.emoji-wifi/emoji-font.json (with its mtime, size and bitmap strikes), so
+later launches stat one file instead of probing every candidate. The record
+is rebuilt when that font changes or disappears, or when a candidate appears
+where none was found before.
+
+Colour emoji fonts are often bitmap-only: Noto Color Emoji has one strike at
+109 px, Apple Color Emoji several from 20 to 160 px. Their strikes are read
+from the font's CBLC or sbix table, and text is drawn at the nearest strike
+and scaled.
+
+NumPy and Pillow are imported on first use, so a launch whose font is
+already on record imports neither.
+
+GlyphAtlas rasterizes a run of text with Pillow once per pixel size and
+packs it into shared RGBA pages. The app uploads the pages to textures for
+the emoji chooser and the SSID display; contact_sheet.py blends card labels
+straight from them.
+"""
+import json
+import logging
+import os
+import struct
+from collections import namedtuple
+
+EMOJI_FONT_PATHS = [
+    '/usr/share/fonts/truetype/noto/NotoColorEmoji.ttf',  # Linux
+    'C:/Windows/Fonts/seguiemj.ttf',  # Windows
+    '/System/Library/Fonts/Apple Color Emoji.ttc',  # Mac
+    '/Library/Fonts/Apple Color Emoji.ttc'  # Alternative Mac
+]
+
+# Strike sizes tried when a bitmap font's tables can't be read
+KNOWN_STRIKES = (20, 32, 40, 48, 64, 96, 109, 136, 160)
+
+FONT_CACHE_VERSION = 2
+
+log = logging.getLogger(__name__)
+
+GlyphRegion = namedtuple('GlyphRegion', 'page x y width height')
+
+
+def default_font_cache_path():
+    from wifi_core import data_dir
+    return os.path.join(data_dir(), 'emoji-font.json')
+
+
+def font_stamp(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def bitmap_strikes(path):
+    """Pixel sizes of the bitmap strikes in a font's CBLC and sbix tables (first face of a collection)"""
+    try:
+        with open(path, 'rb') as f:
+            def read(fmt, offset):
+                f.seek(offset)
+                return struct.unpack(fmt, f.read(struct.calcsize(fmt)))
+
+            face = read('>I', 12)[0] if read('>4s', 0)[0] == b'ttcf' else 0
+            tables = {}
+            for i in range(read('>H', face + 4)[0]):
+                tag, _, offset, _ = read('>4sIII', face + 12 + 16 * i)
+                tables[tag] = offset
+            strikes = set()
+            if b'CBLC' in tables:
+                base = tables[b'CBLC']
+                for i in range(read('>I', base + 4)[0]):
+                    # ppemY of each 48-byte BitmapSize record
+                    strikes.add(read('>B', base + 8 + 48 * i + 45)[0])
+            if b'sbix' in tables:
+                base = tables[b'sbix']
+                for i in range(read('>I', base + 4)[0]):
+                    strikes.add(read('>H', base + read('>I', base + 8 + 4 * i)[0])[0])
+            return sorted(strikes)
+    except (OSError, struct.error):
+        return []
+
+
+def probe_font(path):
+    """Strike sizes a font loads at: [] if it scales to any size, None if it is unusable"""
+    from PIL import ImageFont
+
+    strikes = bitmap_strikes(path)
+    # A size that is not a strike only loads if the font has outlines
+    outline_size = next(size for size in range(16, 32) if size not in strikes)
+    try:
+        ImageFont.truetype(path, outline_size)
+        return []
+    except OSError:
+        pass
+    loadable = []
+    for size in strikes or KNOWN_STRIKES:
+        try:
+            ImageFont.truetype(path, size)
+        except OSError:
+            continue
+        loadable.append(size)
+    return loadable or None
+
+
+def nearest_strike(strikes, size):
+    """The smallest strike at least size pixels high, so glyphs are scaled down; else the largest"""
+    return min((strike for strike in strikes if strike >= size), default=max(strikes))
+
+
+def _read_font_cache(cache_path, candidates):
+    try:
+        with open(cache_path, encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached['version'] != FONT_CACHE_VERSION or cached['candidates'] != candidates:
+            return None
+        path = cached['path']
+        strikes = list(cached['strikes'])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    if path is None:
+        # Nothing was usable last time; only look again if a candidate has appeared
+        return None if any(os.path.isfile(c) for c in candidates) else (None, [])
+    if cached.get('stamp') != font_stamp(path):
+        return None
+    return path, strikes
+
+
+def _write_font_cache(cache_path, candidates, path, strikes):
+    record = {'version': FONT_CACHE_VERSION, 'candidates': candidates, 'path': path, 'strikes': strikes,
+              'stamp': font_stamp(path) if path else None}
+    tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+    try:
+        os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(record, f)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        # Only costs a probe next launch
+        log.warning("Can't write font cache %s: %s", cache_path, e)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def resolve_emoji_font(candidates=None, cache_path=None):
+    """Return (path, strikes) of the first usable candidate font, or (None, []).
+
+    strikes is empty for a scalable font.
+    """
+    candidates = list(candidates or EMOJI_FONT_PATHS)
+    cache_path = cache_path or default_font_cache_path()
+    cached = _read_font_cache(cache_path, candidates)
+    if cached is not None:
+        return cached
+    path, strikes = None, []
+    for candidate in candidates:
+        loadable = probe_font(candidate) if os.path.isfile(candidate) else None
+        if loadable is not None:
+            path, strikes = candidate, loadable
+            break
+    _write_font_cache(cache_path, candidates, path, strikes)
+    return path, strikes
+
+
+class GlyphAtlas:
+    """Text runs rasterized once per pixel size and packed into shared RGBA pages.
+
+    Pages are page_size square NumPy arrays, top row first, filled shelf by
+    shelf; a run too big for a page gets a page of its own. When max_pages
+    are in use the atlas is cleared and generation is incremented, so holders
+    of old regions know to look them up again. New regions are queued until
+    take_pending(), for callers that copy pages to the GPU.
+    """
+
+    def __init__(self, font_path=None, strikes=(), color=(0, 0, 0, 255), page_size=1024, max_pages=8, padding=1):
+        self.font_path = font_path
+        self.strikes = tuple(strikes)
+        self.color = color
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.padding = padding
+        self._fonts = {}
+        self.generation = 0
+        self.clear()
+
+    def clear(self):
+        self.pages = []
+        self.regions = {}
+        self.pending = []
+        self._page = None
+        self._x = self._y = self._shelf_height = 0
+
+    def font(self, size):
+        """Return (font, rendered_size); rendered_size differs for bitmap-only fonts"""
+        from PIL import ImageFont
+
+        if self.strikes:
+            size = nearest_strike(self.strikes, size)
+        if size not in self._fonts:
+            font = None
+            if self.font_path:
+                try:
+                    font = ImageFont.truetype(self.font_path, size)
+                except OSError as e:
+                    log.warning("Can't load %s at %d px: %s", self.font_path, size, e)
+            self._fonts[size] = font or ImageFont.load_default(size)
+        return self._fonts[size], size
+
+    def rasterize(self, text, size):
+        """Draw text size pixels high as an RGBA array cropped to its ink"""
+        import numpy as np
+        from PIL import Image, ImageDraw
+
+        font, rendered = self.font(size)
+        left, top, right, bottom = font.getbbox(text)
+        image = Image.new('RGBA', (max(1, right - left), max(1, bottom - top)), (255, 255, 255, 0))
+        ImageDraw.Draw(image).text((-left, -top), text, font=font, fill=self.color, embedded_color=True)
+        if rendered != size:
+            scale = size / rendered
+            image = image.resize((max(1, round(image.width * scale)), max(1, round(image.height * scale))),
+                                 Image.Resampling.LANCZOS)
+        return np.asarray(image)
+
+    def region(self, text, size):
+        """Region holding text drawn size pixels high, rasterizing it on first use"""
+        key = (text, size)
+        region = self.regions.get(key)
+        if region is None:
+            pixels = self.rasterize(text, size)
+            height, width = pixels.shape[:2]
+            page, x, y = self._allocate(width, height)
+            self.pages[page][y:y + height, x:x + width] = pixels
+            region = self.regions[key] = GlyphRegion(page, x, y, width, height)
+            self.pending.append(region)
+        return region
+
+    def pixels(self, region):
+        return self.pages[region.page][region.y:region.y + region.height, region.x:region.x + region.width]
+
+    def take_pending(self):
+        pending, self.pending = self.pending, []
+        return pending
+
+    def stats(self):
+        return {
+            'runs': len(self.regions),
+            'pages': len(self.pages),
+            'bytes': sum(page.nbytes for page in self.pages),
+            'generation': self.generation,
+        }
+
+    def _allocate(self, width, height):
+        padded_width, padded_height = width + self.padding, height + self.padding
+        if padded_width > self.page_size or padded_height > self.page_size:
+            return self._new_page(height, width), 0, 0
+        if self._page is not None and self._x + padded_width > self.page_size:
+            self._x = 0
+            self._y += self._shelf_height
+            self._shelf_height = 0
+        if self._page is None or self._y + padded_height > self.page_size:
+            self._page = self._new_page(self.page_size, self.page_size)
+            self._x = self._y = self._shelf_height = 0
+        x, y = self._x, self._y
+        self._x += padded_width
+        self._shelf_height = max(self._shelf_height, padded_height)
+        return self._page, x, y
+
+    def _new_page(self, height, width):
+        import numpy as np
+
+        if len(self.pages) >= self.max_pages:
+            self.clear()
+            self.generation += 1
+        self.pages.append(np.zeros((height, width, 4), dtype=np.uint8))
+        return len(self.pages) - 1
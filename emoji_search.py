@@ -0,0 +1,67 @@
+import re
+from array import array
+from bisect import bisect_left
+from functools import lru_cache
+
+from wifi_core import lazy_singleton
+
+_WORD = re.compile(r'[^\W_]+')
+
+
+def tokenize(text):
+    return _WORD.findall(text.casefold())
+
+
+class EmojiSearchIndex:
+    """Inverted index from words to entry ids with prefix lookup.
+
+    terms is the sorted list of distinct words; postings[i] holds the ids of
+    the entries whose keywords contain terms[i]. The words starting with a
+    prefix are one contiguous run of terms, found with two bisections.
+    """
+
+    def __init__(self, emoji, keywords):
+        self.emoji = emoji
+        words = {}
+        for entry, text in enumerate(keywords):
+            for word in set(tokenize(text)):
+                words.setdefault(word, []).append(entry)
+        self.terms = sorted(words)
+        self.postings = [array('I', words[term]) for term in self.terms]
+        # Per-instance cache so repeated and backspaced queries are free
+        self.prefix_matches = lru_cache(maxsize=1024)(self._prefix_matches)
+
+    @classmethod
+    def from_compiled(cls, compiled):
+        return cls(compiled.strings('search'), compiled.strings('search.keywords'))
+
+    def __len__(self):
+        return len(self.emoji)
+
+    def _prefix_matches(self, prefix):
+        start = bisect_left(self.terms, prefix)
+        end = bisect_left(self.terms, prefix + '\U0010ffff', start)
+        matches = set()
+        for postings in self.postings[start:end]:
+            matches.update(postings)
+        return frozenset(matches)
+
+    def search(self, query):
+        """Ids of entries matching every word of query as a prefix, in catalog order"""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        # Longest words first: they are the most selective
+        tokens.sort(key=len, reverse=True)
+        matches = self.prefix_matches(tokens[0])
+        for token in tokens[1:]:
+            if not matches:
+                break
+            matches = matches & self.prefix_matches(token)
+        return sorted(matches)
+
+
+@lazy_singleton
+def get_search_index():
+    from catalog_cache import get_compiled_catalog
+    return EmojiSearchIndex.from_compiled(get_compiled_catalog())
@@ -1,19 +1,172 @@
-import wifi_qrcode_generator.generator
+import argparse
+import csv
+import json
+import logging
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
-# 1. prompt the user for input
-wifi_name = input("Enter the Wi-Fi Name (SSID): ")
-wifi_password = input("Enter the Wi-Fi Password: ")
+import credentials
+from qr_render import DEFAULT_BORDER, DEFAULT_ERROR_CORRECTION, ERROR_CORRECTION_LEVELS, make_qr_code
 
-# 2. Generate the QR code using the provided variables
-qr_code = wifi_qrcode_generator.generator.wifi_qrcode(
-    ssid=wifi_name,
-    hidden=False,
-    authentication_type='WPA',
-    password=wifi_password
-)
+# Column names accepted for each field, matched case-insensitively.
+# combos.csv keeps the SSID in "Emojis" and single.csv in "Emoji".
+SSID_COLUMNS = ('ssid', 'emojis', 'emoji')
+PASSWORD_COLUMNS = ('password', 'pass', 'psk')
+AUTH_COLUMNS = ('authentication_type', 'auth', 'security', 'type')
+HIDDEN_COLUMNS = ('hidden',)
 
-# 3. Output the result
-qr_code.print_ascii()
-qr_code.make_image().save('qr.png')
+log = logging.getLogger('generate_wifi_qrcode')
 
-print(f"\nSuccess! QR code for '{wifi_name}' has been saved as 'qr.png'.")
\ No newline at end of file
+
+def pick(row, columns, default=None):
+    # JSONL values may be numbers; everything but hidden is used as text
+    for column in columns:
+        value = row.get(column)
+        if value not in (None, ''):
+            return value if isinstance(value, str) else str(value)
+    return default
+
+
+def parse_hidden(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'y')
+
+
+def read_networks(path):
+    """Yield one network dict per CSV or JSONL row without loading the whole file"""
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.lower().endswith(('.jsonl', '.ndjson')):
+            rows = (json.loads(line) for line in f if line.strip())
+        else:
+            rows = csv.DictReader(f)
+        for row in rows:
+            row = {str(k).strip().lower(): v for k, v in row.items() if k is not None}
+            ssid = pick(row, SSID_COLUMNS)
+            if not ssid:
+                continue
+            yield {
+                'ssid': ssid,
+                'password': pick(row, PASSWORD_COLUMNS),
+                'authentication_type': pick(row, AUTH_COLUMNS, 'WPA'),
+                'hidden': parse_hidden(pick(row, HIDDEN_COLUMNS, False)),
+            }
+
+
+def render_network(index, network, out_dir, error_correction=DEFAULT_ERROR_CORRECTION, border=DEFAULT_BORDER):
+    """Render one network to <out_dir>/<index>.png and return its manifest entry"""
+    password = network['password']
+    if not password and network['authentication_type'] != 'nopass':
+        password = credentials.generate_wpa3_password()
+
+    qr_code = make_qr_code(
+        ssid=network['ssid'],
+        password=password,
+        authentication_type=network['authentication_type'],
+        hidden=network['hidden'],
+        error_correction=error_correction,
+        border=border
+    )
+    filename = f"{index:06d}.png"
+    qr_code.make_image().save(os.path.join(out_dir, filename))
+    return dict(network, index=index, password=password, file=filename,
+                version=qr_code.version, modules=qr_code.modules_count)
+
+
+def run_batch(input_path, out_dir, manifest_path=None, workers=None,
+              error_correction=DEFAULT_ERROR_CORRECTION, border=DEFAULT_BORDER):
+    """Render every network in input_path; returns (rendered, failed, manifest_path).
+
+    A row that fails to render is logged and written to the manifest with an
+    "error" field instead of a file, and the batch carries on.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = manifest_path or os.path.join(out_dir, 'manifest.jsonl')
+    workers = workers or os.cpu_count() or 1
+
+    # Bound the number of in-flight jobs so input and output are streamed
+    max_pending = workers * 4
+    count = failed = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool, \
+            open(manifest_path, 'w', encoding='utf-8') as manifest:
+        pending = deque()
+
+        def finish():
+            nonlocal count, failed
+            index, network, future = pending.popleft()
+            try:
+                entry = future.result()
+                count += 1
+            except Exception as e:
+                log.error("Row %d (%r) failed: %s", index, network['ssid'][:40], e)
+                entry = dict(network, index=index, error=f'{type(e).__name__}: {e}')
+                failed += 1
+            manifest.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+        for index, network in enumerate(read_networks(input_path)):
+            future = pool.submit(render_network, index, network, out_dir, error_correction, border)
+            pending.append((index, network, future))
+            if len(pending) >= max_pending:
+                finish()
+        while pending:
+            finish()
+    return count, failed, manifest_path
+
+
+def run_interactive(error_correction=DEFAULT_ERROR_CORRECTION, border=DEFAULT_BORDER):
+    # 1. prompt the user for input
+    wifi_name = input("Enter the Wi-Fi Name (SSID): ")
+    wifi_password = input("Enter the Wi-Fi Password: ")
+
+    # 2. Generate the QR code using the provided variables
+    qr_code = make_qr_code(
+        ssid=wifi_name,
+        password=wifi_password,
+        authentication_type='WPA',
+        hidden=False,
+        error_correction=error_correction,
+        border=border
+    )
+
+    # 3. Output the result
+    qr_code.print_ascii()
+    qr_code.make_image().save('qr.png')
+
+    print(f"\nSuccess! QR code for '{wifi_name}' has been saved as 'qr.png'.")
+    print(f"Version {qr_code.version}: {qr_code.modules_count}x{qr_code.modules_count} modules, "
+          f"error correction {error_correction}, quiet zone {border}.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate WiFi QR codes.")
+    parser.add_argument('--batch', metavar='FILE',
+                        help="CSV or JSONL list of networks to render headlessly")
+    parser.add_argument('--out', default='qr_codes',
+                        help="output directory for batch PNGs (default: qr_codes)")
+    parser.add_argument('--manifest',
+                        help="manifest path (default: <out>/manifest.jsonl)")
+    parser.add_argument('--workers', type=int,
+                        help="worker processes (default: number of cores)")
+    parser.add_argument('--error-correction', choices=sorted(ERROR_CORRECTION_LEVELS),
+                        default=DEFAULT_ERROR_CORRECTION,
+                        help=f"L gives the smallest, easiest to scan codes; H survives the most damage "
+                             f"(default: {DEFAULT_ERROR_CORRECTION})")
+    parser.add_argument('--border', type=int, default=DEFAULT_BORDER,
+                        help=f"quiet zone in modules (default: {DEFAULT_BORDER})")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING, format='%(levelname)s %(name)s: %(message)s')
+
+    if not args.batch:
+        run_interactive(args.error_correction, args.border)
+        return
+
+    count, failed, manifest_path = run_batch(args.batch, args.out, args.manifest, args.workers,
+                                             args.error_correction, args.border)
+    print(f"Success! Rendered {count} QR codes into '{args.out}', manifest at '{manifest_path}'.")
+    if failed:
+        print(f"{failed} row(s) failed; see the \"error\" entries in the manifest.")
+
+
+if __name__ == '__main__':
+    main()
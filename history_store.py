@@ -0,0 +1,267 @@
+import hashlib
+import logging
+import math
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS networks (
+    id INTEGER PRIMARY KEY,
+    created REAL NOT NULL,
+    source TEXT NOT NULL,
+    ssid TEXT NOT NULL,
+    password TEXT,
+    security_type TEXT,
+    hidden INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS networks_ssid ON networks (ssid);
+CREATE INDEX IF NOT EXISTS networks_password ON networks (password);
+CREATE INDEX IF NOT EXISTS networks_source_id ON networks (source, id);
+"""
+
+COLUMNS = ('id', 'created', 'source', 'ssid', 'password', 'security_type', 'hidden')
+
+log = logging.getLogger(__name__)
+
+
+def default_history_path():
+    from wifi_core import data_dir
+    return os.path.join(data_dir(), 'history.sqlite3')
+
+
+def unissued(generate, issued, attempts=20):
+    """Call generate until it returns a value that issued() rejects, keeping the last try"""
+    value = generate()
+    for _ in range(attempts - 1):
+        if not issued(value):
+            break
+        value = generate()
+    return value
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings using double hashing"""
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = max(1, capacity)
+        self.size = max(8, int(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+        # add() is a read-modify-write of shared bytes and runs on several threads;
+        # a lost bit would make a stored value look new
+        self._lock = threading.Lock()
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        positions = self._positions(item)
+        with self._lock:
+            for position in positions:
+                self.bits[position >> 3] |= 1 << (position & 7)
+            self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+
+class HistoryStore:
+    """Persistent history of generated and scanned networks.
+
+    Writes are queued and committed in batches by a background thread, so
+    callers on the UI thread never wait on disk. SSIDs and passwords are also
+    kept in Bloom filters: a miss answers "already issued?" in O(1), and a hit
+    is confirmed against the pending queue and the indexed table.
+
+    If the database can't be opened (say the data directory isn't writable),
+    the history is kept in memory for the session instead, like the catalog
+    cache falling back to an in-memory build.
+    """
+
+    def __init__(self, path=None, batch_size=500, flush_interval=0.05, expected=1_000_000):
+        self.path = path or default_history_path()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._read_lock = threading.Lock()
+        try:
+            self._reader = self._open(self.path)
+        except (OSError, sqlite3.Error) as e:
+            log.warning("Can't open history %s (%s); keeping it in memory for this session", self.path, e)
+            self.path = ':memory:'
+            self._reader = self._open(self.path)
+        # An in-memory database only exists on its one connection, which the
+        # writer then shares under the read lock
+        self.in_memory = self.path == ':memory:'
+        self._write_lock = self._read_lock if self.in_memory else threading.Lock()
+        # Ids only grow, so the largest is a bound on the row count that the
+        # primary key answers without a table scan
+        last_id = self._reader.execute("SELECT MAX(id) FROM networks").fetchone()[0] or 0
+
+        capacity = max(expected, last_id * 2)
+        self._ssids = BloomFilter(capacity)
+        self._passwords = BloomFilter(capacity)
+        self._bloom_ready = threading.Event()
+        self._pending_lock = threading.Lock()
+        self._pending_ssids = {}
+        self._pending_passwords = {}
+
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name='history-writer', daemon=True)
+        self._writer.start()
+
+    def _open(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = self._connect(path)
+        try:
+            connection.executescript(SCHEMA)
+        except sqlite3.Error:
+            connection.close()
+            raise
+        return connection
+
+    @staticmethod
+    def _connect(path):
+        connection = sqlite3.connect(path, check_same_thread=False)
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+        except sqlite3.Error:
+            connection.close()
+            raise
+        return connection
+
+    def record(self, ssid, password=None, security_type='WPA', hidden=False, source='generated'):
+        row = (time.time(), source, ssid, password, security_type, int(bool(hidden)))
+        with self._pending_lock:
+            self._pending_ssids[ssid] = self._pending_ssids.get(ssid, 0) + 1
+            if password:
+                self._pending_passwords[password] = self._pending_passwords.get(password, 0) + 1
+        self._ssids.add(ssid)
+        if password:
+            self._passwords.add(password)
+        self._queue.put(row)
+
+    def ssid_issued(self, ssid):
+        return self._issued('ssid', ssid, self._ssids, self._pending_ssids)
+
+    def password_issued(self, password):
+        return self._issued('password', password, self._passwords, self._pending_passwords)
+
+    def _issued(self, column, value, bloom, pending):
+        if self._bloom_ready.is_set() and value not in bloom:
+            return False
+        with self._pending_lock:
+            if value in pending:
+                return True
+        with self._read_lock:
+            row = self._reader.execute(
+                f"SELECT 1 FROM networks WHERE {column} = ? LIMIT 1", (value,)
+            ).fetchone()
+        return row is not None
+
+    def page(self, before_id=None, limit=50, source=None):
+        """Newest-first page of rows; pass the last row's id as before_id for the next page"""
+        clauses = []
+        params = []
+        if source:
+            clauses.append("source = ?")
+            params.append(source)
+        if before_id is not None:
+            clauses.append("id < ?")
+            params.append(before_id)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        params.append(limit)
+        with self._read_lock:
+            rows = self._reader.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM networks {where} ORDER BY id DESC LIMIT ?", params
+            ).fetchall()
+        return [dict(zip(COLUMNS, row)) for row in rows]
+
+    def count(self):
+        with self._read_lock:
+            return self._reader.execute("SELECT COUNT(*) FROM networks").fetchone()[0]
+
+    def flush(self):
+        """Block until everything recorded so far is committed"""
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+
+    def close(self):
+        self._queue.put(None)
+        self._writer.join()
+        with self._read_lock:
+            self._reader.close()
+
+    def _load_filters(self, connection, chunk_size=10000):
+        # The lock is taken per chunk, so reads on a shared in-memory
+        # connection are not held up for the whole load
+        last_id = 0
+        while True:
+            with self._write_lock:
+                rows = connection.execute(
+                    "SELECT id, ssid, password FROM networks WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, chunk_size)
+                ).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            for _, ssid, password in rows:
+                self._ssids.add(ssid)
+                if password:
+                    self._passwords.add(password)
+        self._bloom_ready.set()
+
+    def _write_loop(self):
+        connection = self._reader if self.in_memory else self._connect(self.path)
+        # Until the filters hold every stored row, lookups fall back to the index
+        self._load_filters(connection)
+        running = True
+        while running:
+            batch = []
+            waiters = []
+            item = self._queue.get()
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is None:
+                    running = False
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+                if not running or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            if batch:
+                with self._write_lock, connection:
+                    connection.executemany(
+                        "INSERT INTO networks (created, source, ssid, password, security_type, hidden) "
+                        "VALUES (?, ?, ?, ?, ?, ?)", batch
+                    )
+                self._clear_pending(batch)
+            for waiter in waiters:
+                waiter.set()
+        if not self.in_memory:
+            connection.close()
+
+    def _clear_pending(self, batch):
+        with self._pending_lock:
+            for _, _, ssid, password, _, _ in batch:
+                for pending, key in ((self._pending_ssids, ssid), (self._pending_passwords, password)):
+                    if key and key in pending:
+                        pending[key] -= 1
+                        if not pending[key]:
+                            del pending[key]
@@ -0,0 +1,155 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class LatencyWindow:
+    """Latency samples in milliseconds over the most recent events"""
+
+    def __init__(self, size):
+        self.samples = deque(maxlen=size)
+        self.count = 0
+        self.total_ms = 0.0
+
+    def add(self, ms):
+        self.samples.append(ms)
+        self.count += 1
+        self.total_ms += ms
+
+    def percentile(self, fraction):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean_ms': self.total_ms / self.count if self.count else 0.0,
+            'p50_ms': self.percentile(0.50),
+            'p95_ms': self.percentile(0.95),
+            'last_ms': self.samples[-1] if self.samples else 0.0,
+        }
+
+
+class RateWindow:
+    """Events per second over a sliding time window"""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.events = deque()
+
+    def tick(self, now):
+        self.events.append(now)
+        self._trim(now)
+
+    def rate(self, now):
+        self._trim(now)
+        return len(self.events) / self.seconds
+
+    def _trim(self, now):
+        while self.events and now - self.events[0] > self.seconds:
+            self.events.popleft()
+
+
+class Metrics:
+    """Thread-safe registry of named timers, rates and counters"""
+
+    def __init__(self, samples=512, rate_seconds=2.0):
+        self.samples = samples
+        self.rate_seconds = rate_seconds
+        self._lock = threading.Lock()
+        self._timers = {}
+        self._rates = {}
+        self._counters = {}
+
+    @contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - start) * 1000)
+
+    def record(self, name, ms):
+        with self._lock:
+            window = self._timers.get(name)
+            if window is None:
+                window = self._timers[name] = LatencyWindow(self.samples)
+            window.add(ms)
+
+    def tick(self, name):
+        now = time.monotonic()
+        with self._lock:
+            window = self._rates.get(name)
+            if window is None:
+                window = self._rates[name] = RateWindow(self.rate_seconds)
+            window.tick(now)
+
+    def increment(self, name, amount=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def counter(self, name):
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def rate(self, name):
+        with self._lock:
+            window = self._rates.get(name)
+            return window.rate(time.monotonic()) if window else 0.0
+
+    def latency(self, name):
+        with self._lock:
+            window = self._timers.get(name)
+            return window.summary() if window else LatencyWindow(1).summary()
+
+    def snapshot(self):
+        now = time.monotonic()
+        with self._lock:
+            return {
+                'time': time.time(),
+                'timers': {name: w.summary() for name, w in self._timers.items()},
+                'rates': {name: w.rate(now) for name, w in self._rates.items()},
+                'counters': dict(self._counters),
+            }
+
+
+# Shared registry used by the app and the scanner pipeline
+METRICS = Metrics()
+
+
+class MetricsDumper:
+    """Append a JSON-lines snapshot of a Metrics registry to a file at a fixed interval"""
+
+    def __init__(self, path, metrics=METRICS, interval=10.0):
+        self.path = path
+        self.metrics = metrics
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name='metrics-dump', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(self.interval)
+            self._thread = None
+        self.dump()
+
+    def dump(self):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(self.metrics.snapshot()) + '\n')
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.dump()
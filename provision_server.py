@@ -0,0 +1,428 @@
+"""Local HTTP service that hands out emoji WiFi credentials and QR codes.
+
+    python provision_server.py --host 0.0.0.0 --port 8080
+
+Endpoints (all GET; HEAD also works, except on /credentials and /batch,
+which issue new credentials on every request):
+
+    /credentials?emoji=3&length=62          a fresh SSID and password as JSON
+    /qr.png?ssid=..&password=..&size=512    QR code as PNG
+    /qr.svg?ssid=..&password=..&module=10   QR code as SVG
+    /batch?count=50&emoji=3&length=62       many credentials as JSON, or a ZIP
+                                            of PNGs plus manifest.jsonl with format=zip
+    /metrics                                request timers and cache counters
+
+The QR endpoints also take auth (WPA, WEP or nopass), hidden, ec (L, M, Q or
+H error correction) and border (quiet zone in modules). Their ETag
+is derived from the request itself, so a client that sends If-None-Match gets
+a 304 without anything being rendered. Rendering runs in a process pool and
+the results are kept in an LRU cache; the event loop only parses requests and
+writes responses. Passwords travel in query strings, so only serve this on a
+trusted network.
+"""
+import argparse
+import asyncio
+import hashlib
+import io
+import json
+import logging
+import signal
+import threading
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+from generate_wifi_qrcode import parse_hidden
+from history_store import HistoryStore, unissued
+from metrics import METRICS
+from qr_render import (DEFAULT_BORDER, DEFAULT_ERROR_CORRECTION, ERROR_CORRECTION_LEVELS, encode_png,
+                       encode_svg, qr_matrix)
+from ssid_generator import get_ssid_index
+from wifi_core import WiFiUtils
+from wifi_payload import encode_wifi_payload
+
+# Part of every ETag; bump it when the rendered output changes
+RENDER_VERSION = 1
+MAX_BATCH = 1000
+MAX_SIZE = 4096
+AUTH_TYPES = ('WPA', 'WEP', 'nopass')
+# Endpoints that issue and record new credentials on every request
+ISSUING_PATHS = ('/credentials', '/batch')
+BATCH_CHUNK = 32
+
+REASONS = {
+    200: 'OK',
+    304: 'Not Modified',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    500: 'Internal Server Error',
+    503: 'Service Unavailable',
+}
+CONTENT_TYPES = {'png': 'image/png', 'svg': 'image/svg+xml'}
+
+log = logging.getLogger('provision')
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+def render_qr(kind, ssid, password, authentication_type, hidden, size,
+              error_correction=DEFAULT_ERROR_CORRECTION, border=DEFAULT_BORDER):
+    """Render one QR image; runs in a worker process"""
+    matrix = qr_matrix(ssid, password, authentication_type, hidden, error_correction, border)
+    if kind == 'png':
+        return encode_png(matrix, size)
+    return encode_svg(matrix, size)
+
+
+def render_pngs(networks, size, error_correction=DEFAULT_ERROR_CORRECTION, border=DEFAULT_BORDER):
+    return [render_qr('png', n['ssid'], n['password'], n['security_type'], False, size, error_correction, border)
+            for n in networks]
+
+
+def build_zip(networks, images):
+    buffer = io.BytesIO()
+    # PNG data is already deflated; storing it avoids compressing twice
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as archive:
+        manifest = []
+        for index, (network, image) in enumerate(zip(networks, images)):
+            filename = f'{index:06d}.png'
+            archive.writestr(filename, image)
+            manifest.append(json.dumps({**network, 'file': filename}, ensure_ascii=False))
+        archive.writestr('manifest.jsonl', '\n'.join(manifest) + '\n')
+    return buffer.getvalue()
+
+
+class RenderCache:
+    """LRU of rendered bodies bounded by their total size"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        body = self.entries.get(key)
+        if body is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return body
+
+    def put(self, key, body):
+        if len(body) > self.max_bytes:
+            return
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.size -= len(old)
+        self.entries[key] = body
+        self.size += len(body)
+        while self.size > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    def stats(self):
+        return {'entries': len(self.entries), 'bytes': self.size, 'hits': self.hits, 'misses': self.misses}
+
+
+def int_param(query, name, default, low, high):
+    value = query.get(name, default)
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise HTTPError(400, f"{name} must be an integer")
+    if not low <= value <= high:
+        raise HTTPError(400, f"{name} must be between {low} and {high}")
+    return value
+
+
+def error_correction_param(query):
+    level = query.get('ec') or DEFAULT_ERROR_CORRECTION
+    if level not in ERROR_CORRECTION_LEVELS:
+        raise HTTPError(400, f"ec must be one of {', '.join(ERROR_CORRECTION_LEVELS)}")
+    return level
+
+
+def etag_for(key):
+    digest = hashlib.blake2b(repr((RENDER_VERSION,) + key).encode('utf-8'), digest_size=16)
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(header, etag):
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(',')]
+    # Weak comparison, as If-None-Match requires
+    return '*' in candidates or etag in candidates or f'W/{etag}' in candidates
+
+
+class ProvisioningService:
+    def __init__(self, executor, history=None, cache_bytes=64 << 20):
+        self.executor = executor
+        self.history = history
+        self.cache = RenderCache(cache_bytes)
+        self.inflight = {}
+        # Credentials are made on executor threads; checking the history and
+        # recording the result happen under this lock, so two requests can't
+        # both be handed the same unused SSID or password
+        self.issue_lock = threading.Lock()
+
+    # Credentials
+
+    def new_ssids(self, count, emoji):
+        index = get_ssid_index()
+        ssids = []
+        seen = set()
+        attempts = 0
+        while len(ssids) < count and attempts < count * 20:
+            attempts += 1
+            ssid = index.generate(emoji)
+            if ssid in seen or (self.history and self.history.ssid_issued(ssid)):
+                continue
+            seen.add(ssid)
+            ssids.append(ssid)
+        if len(ssids) < count:
+            raise HTTPError(503, f"Could not find {count} unused {emoji}-emoji SSIDs")
+        return ssids
+
+    def new_credentials(self, count, emoji, length):
+        passwords = WiFiUtils.generate_wpa3_passwords(count, length)
+        with self.issue_lock:
+            try:
+                ssids = self.new_ssids(count, emoji)
+            except ValueError as e:
+                raise HTTPError(400, str(e))
+            if self.history:
+                for i, ssid in enumerate(ssids):
+                    if self.history.password_issued(passwords[i]):
+                        passwords[i] = unissued(lambda: WiFiUtils.generate_wpa3_password(length),
+                                                self.history.password_issued)
+                    self.history.record(ssid, passwords[i], 'WPA', False, source='provisioned')
+        networks = []
+        for ssid, password in zip(ssids, passwords):
+            networks.append({
+                'ssid': ssid,
+                'password': password,
+                'security_type': 'WPA',
+                'payload': encode_wifi_payload(ssid, password),
+                'qr_png': '/qr.png?' + urlencode({'ssid': ssid, 'password': password}),
+                'qr_svg': '/qr.svg?' + urlencode({'ssid': ssid, 'password': password}),
+            })
+        return networks
+
+    # Rendering
+
+    async def render(self, key):
+        body = self.cache.get(key)
+        if body is not None:
+            return body
+        future = self.inflight.get(key)
+        if future is None:
+            # Identical concurrent requests share one render
+            future = asyncio.get_running_loop().run_in_executor(self.executor, render_qr, *key)
+            self.inflight[key] = future
+            future.add_done_callback(partial(self._rendered, key))
+        # A client hanging up must not cancel a render others are waiting on
+        return await asyncio.shield(future)
+
+    def _rendered(self, key, future):
+        self.inflight.pop(key, None)
+        if not future.cancelled() and future.exception() is None:
+            self.cache.put(key, future.result())
+
+    async def render_zip(self, networks, size, error_correction, border):
+        loop = asyncio.get_running_loop()
+        chunks = [networks[i:i + BATCH_CHUNK] for i in range(0, len(networks), BATCH_CHUNK)]
+        rendered = await asyncio.gather(*(
+            loop.run_in_executor(self.executor, render_pngs, chunk, size, error_correction, border)
+            for chunk in chunks
+        ))
+        images = [image for chunk in rendered for image in chunk]
+        return await loop.run_in_executor(None, build_zip, networks, images)
+
+    # HTTP
+
+    async def respond(self, method, target, headers):
+        if method not in ('GET', 'HEAD'):
+            raise HTTPError(405, "Only GET and HEAD are supported", {'Allow': 'GET, HEAD'})
+        url = urlsplit(target)
+        if method == 'HEAD' and url.path in ISSUING_PATHS:
+            # Every GET issues and records new credentials; a HEAD must not
+            raise HTTPError(405, f"{url.path} only supports GET", {'Allow': 'GET'})
+        query = {k: v[-1] for k, v in parse_qs(url.query, keep_blank_values=True).items()}
+        loop = asyncio.get_running_loop()
+
+        if url.path == '/credentials':
+            networks = await loop.run_in_executor(
+                None, self.new_credentials, 1,
+                int_param(query, 'emoji', 3, 1, 8), int_param(query, 'length', 62, 8, 63)
+            )
+            return 200, {'Cache-Control': 'no-store'}, json_body(networks[0])
+
+        if url.path in ('/qr.png', '/qr.svg'):
+            kind = url.path[-3:]
+            ssid = query.get('ssid', '')
+            if not ssid:
+                raise HTTPError(400, "ssid is required")
+            password = query.get('password') or None
+            auth = query.get('auth') or ('WPA' if password else 'nopass')
+            if auth not in AUTH_TYPES:
+                raise HTTPError(400, f"auth must be one of {', '.join(AUTH_TYPES)}")
+            if kind == 'png':
+                size = int_param(query, 'size', 512, 21, MAX_SIZE)
+            else:
+                size = int_param(query, 'module', 10, 1, 100)
+            key = (kind, ssid, password, auth, parse_hidden(query.get('hidden', False)), size,
+                   error_correction_param(query), int_param(query, 'border', DEFAULT_BORDER, 0, 16))
+            etag = etag_for(key)
+            response_headers = {
+                'Content-Type': CONTENT_TYPES[kind],
+                'ETag': etag,
+                'Cache-Control': 'private, no-cache',
+            }
+            if etag_matches(headers.get('if-none-match'), etag):
+                return 304, response_headers, b''
+            return 200, response_headers, await self.render(key)
+
+        if url.path == '/batch':
+            # Generation and history checks for a large batch take a while; keep them off the loop
+            networks = await loop.run_in_executor(
+                None, self.new_credentials, int_param(query, 'count', 10, 1, MAX_BATCH),
+                int_param(query, 'emoji', 3, 1, 8), int_param(query, 'length', 62, 8, 63)
+            )
+            if query.get('format', 'json') == 'zip':
+                body = await self.render_zip(networks, int_param(query, 'size', 512, 21, MAX_SIZE),
+                                             error_correction_param(query),
+                                             int_param(query, 'border', DEFAULT_BORDER, 0, 16))
+                return 200, {
+                    'Content-Type': 'application/zip',
+                    'Content-Disposition': 'attachment; filename="networks.zip"',
+                    'Cache-Control': 'no-store',
+                }, body
+            return 200, {'Cache-Control': 'no-store'}, json_body(networks)
+
+        if url.path == '/metrics':
+            return 200, {'Cache-Control': 'no-store'}, json_body({**METRICS.snapshot(), 'cache': self.cache.stats()})
+
+        raise HTTPError(404, f"No such endpoint: {url.path}")
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self.send(writer, 'HEAD', 400, {}, b'')
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                # Request bodies are not used by any endpoint; skip them
+                body_length = int(headers.get('content-length') or 0)
+                if body_length:
+                    await reader.readexactly(body_length)
+
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection == 'keep-alive' if version == 'HTTP/1.0' else connection != 'close'
+
+                METRICS.tick('http')
+                with METRICS.timer(f'http {urlsplit(target).path}'):
+                    try:
+                        status, response_headers, body = await self.respond(method, target, headers)
+                    except HTTPError as e:
+                        status, response_headers, body = e.status, dict(e.headers), json_body({'error': str(e)})
+                    except Exception as e:
+                        log.exception("Error handling %s %s: %s", method, target, e)
+                        status, response_headers, body = 500, {}, json_body({'error': 'internal error'})
+                if not keep_alive:
+                    response_headers['Connection'] = 'close'
+                await self.send(writer, method, status, response_headers, body)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    @staticmethod
+    async def send(writer, method, status, headers, body):
+        headers.setdefault('Content-Type', 'application/json')
+        headers['Content-Length'] = str(len(body))
+        head = [f'HTTP/1.1 {status} {REASONS[status]}']
+        head.extend(f'{name}: {value}' for name, value in headers.items())
+        writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1'))
+        if method != 'HEAD' and status != 304:
+            writer.write(body)
+        await writer.drain()
+
+
+def json_body(value):
+    return json.dumps(value, ensure_ascii=False).encode('utf-8')
+
+
+async def serve(host, port, workers=None, history=None, cache_bytes=64 << 20):
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows: Ctrl+C still raises KeyboardInterrupt
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        service = ProvisioningService(executor, history, cache_bytes)
+        server = await asyncio.start_server(service.handle, host, port)
+        for sock in server.sockets:
+            address = sock.getsockname()
+            print(f"Serving on http://{address[0]}:{address[1]}", flush=True)
+        async with server:
+            # Returning shuts the render pool down and lets main() flush the history
+            await stop.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve WiFi credentials and QR codes over HTTP.")
+    parser.add_argument('--host', default='127.0.0.1', help="address to bind (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--workers', type=int, help="render processes (default: one per core)")
+    parser.add_argument('--cache-mb', type=int, default=64, help="render cache size (default: 64)")
+    parser.add_argument('--no-history', action='store_true',
+                        help="don't record issued networks or check new ones against the history")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s %(name)s: %(message)s')
+    # Load the SSID index up front instead of on the first request
+    get_ssid_index()
+    history = None if args.no_history else HistoryStore()
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, history, args.cache_mb << 20))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if history:
+            history.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from wifi_payload import parse_wifi_config
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif', '.tif', '.tiff', '.webp')
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.m4v', '.avi', '.mkv', '.webm')
+OUTPUT_FIELDS = ('ssid', 'password', 'security_type', 'hidden', 'source')
+
+
+def _decode_gray(cv2, zxingcpp, image):
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return [r.text for r in zxingcpp.read_barcodes(gray, formats=zxingcpp.BarcodeFormat.QRCode)]
+
+
+def decode_image(path):
+    """Worker: decode every QR code in one image file"""
+    import cv2
+    import zxingcpp
+
+    image = cv2.imread(path, cv2.IMREAD_COLOR)
+    if image is None:
+        return [(path, [])]
+    return [(path, _decode_gray(cv2, zxingcpp, image))]
+
+
+def _seek(cv2, capture, path, index):
+    """Position capture at frame index, reading up to it if the container can't seek"""
+    if not index:
+        return capture
+    if capture.set(cv2.CAP_PROP_POS_FRAMES, index) and int(capture.get(cv2.CAP_PROP_POS_FRAMES)) == index:
+        return capture
+    capture.release()
+    capture = cv2.VideoCapture(path)
+    for _ in range(index):
+        if not capture.grab():
+            break
+    return capture
+
+
+def decode_video_range(path, start, stop, step):
+    """Worker: decode every step-th frame in [start, stop) of a video file; stop=None reads to the end"""
+    import cv2
+    import zxingcpp
+
+    capture = _seek(cv2, cv2.VideoCapture(path), path, start)
+    hits = []
+    for index in itertools.count(start) if stop is None else range(start, stop):
+        if (index - start) % step:
+            if not capture.grab():
+                break
+            continue
+        ok, frame = capture.read()
+        if not ok:
+            break
+        hits.append((f"{path}#{index}", _decode_gray(cv2, zxingcpp, frame)))
+    capture.release()
+    return hits
+
+
+def iter_image_tasks(root):
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                yield decode_image, (os.path.join(dirpath, name),)
+
+
+def iter_video_tasks(path, step, chunk_frames):
+    import cv2
+
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise SystemExit(f"Could not open video {path}")
+    total = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+    capture.release()
+    if total <= 0:
+        # Streams and some containers don't report a length: read it in one pass
+        yield decode_video_range, (path, 0, None, step)
+        return
+    for start in range(0, total, chunk_frames):
+        yield decode_video_range, (path, start, min(start + chunk_frames, total), step)
+
+
+def run_tasks(tasks, workers):
+    """Run (function, args) tasks on a process pool, yielding results with a bounded backlog"""
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for function, args in tasks:
+            pending.append(pool.submit(function, *args))
+            if len(pending) >= workers * 4:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class NetworkWriter:
+    """Stream unique networks to CSV or JSONL as they are first seen"""
+
+    def __init__(self, path):
+        self.path = path
+        self.seen = set()
+        self.file = sys.stdout if path == '-' else open(path, 'w', newline='', encoding='utf-8')
+        self.csv = None
+        if path.lower().endswith('.csv'):
+            self.csv = csv.DictWriter(self.file, fieldnames=OUTPUT_FIELDS)
+            self.csv.writeheader()
+
+    def add(self, network, source):
+        key = (network['ssid'], network['password'], network['security_type'], network['hidden'])
+        if key in self.seen:
+            return False
+        self.seen.add(key)
+        record = dict(network, source=source)
+        if self.csv:
+            self.csv.writerow(record)
+        else:
+            self.file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        return True
+
+    def close(self):
+        if self.file is not sys.stdout:
+            self.file.close()
+
+
+def import_codes(tasks, output, workers, progress_interval=1.0):
+    writer = NetworkWriter(output)
+    items = codes = invalid = 0
+    start = last_report = time.monotonic()
+    try:
+        for hits in run_tasks(tasks, workers):
+            for source, texts in hits:
+                items += 1
+                for text in texts:
+                    codes += 1
+                    if text[:5].upper() != 'WIFI:':
+                        invalid += 1
+                        continue
+                    try:
+                        network = parse_wifi_config(text)
+                    except ValueError:
+                        invalid += 1
+                        continue
+                    writer.add(network, source)
+            now = time.monotonic()
+            if now - last_report >= progress_interval:
+                last_report = now
+                print(f"\r{items} scanned, {codes} codes, {len(writer.seen)} networks, "
+                      f"{items / (now - start):.1f}/s", end='', file=sys.stderr, flush=True)
+    finally:
+        writer.close()
+    elapsed = time.monotonic() - start
+    print(f"\rDone: {items} scanned in {elapsed:.1f}s ({items / max(elapsed, 1e-9):.1f}/s), "
+          f"{codes} codes, {invalid} not WiFi, {len(writer.seen)} unique networks.",
+          file=sys.stderr)
+    return len(writer.seen)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Import WiFi QR codes from a folder of images or a video file."
+    )
+    parser.add_argument('source', help="image directory or video file")
+    parser.add_argument('-o', '--output', default='-',
+                        help="output .csv or .jsonl file (default: JSONL on stdout)")
+    parser.add_argument('--workers', type=int, help="worker processes (default: number of cores)")
+    parser.add_argument('--every', type=int, default=1, metavar='N',
+                        help="decode every N-th video frame (default: 1)")
+    parser.add_argument('--chunk-frames', type=int, default=300,
+                        help="video frames per worker task (default: 300)")
+    args = parser.parse_args()
+
+    workers = args.workers or os.cpu_count() or 1
+    if os.path.isdir(args.source):
+        tasks = iter_image_tasks(args.source)
+    elif args.source.lower().endswith(VIDEO_EXTENSIONS):
+        tasks = iter_video_tasks(args.source, max(1, args.every), args.chunk_frames)
+    elif args.source.lower().endswith(IMAGE_EXTENSIONS):
+        tasks = [(decode_image, (args.source,))]
+    else:
+        parser.error(f"{args.source} is not a directory, image or video file")
+    import_codes(tasks, args.output, workers)
+
+
+if __name__ == '__main__':
+    main()
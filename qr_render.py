@@ -0,0 +1,128 @@
+import struct
+import zlib
+from functools import lru_cache
+
+import qrcode
+from qrcode.constants import ERROR_CORRECT_H, ERROR_CORRECT_L, ERROR_CORRECT_M, ERROR_CORRECT_Q
+
+from wifi_payload import encode_wifi_payload
+
+# RGBA pixels for light (False) and dark (True) modules
+LIGHT_PIXEL = b'\xff\xff\xff\xff'
+DARK_PIXEL = b'\x00\x00\x00\xff'
+
+# Recoverable damage: L ~7%, M ~15%, Q ~25%, H ~30%. Lower levels give smaller codes.
+ERROR_CORRECTION_LEVELS = {
+    'L': ERROR_CORRECT_L,
+    'M': ERROR_CORRECT_M,
+    'Q': ERROR_CORRECT_Q,
+    'H': ERROR_CORRECT_H,
+}
+DEFAULT_ERROR_CORRECTION = 'M'
+# The spec asks for 4 modules of quiet zone; most phone scanners manage with 2
+DEFAULT_BORDER = 4
+
+# Minimum run lengths qrcode may split into numeric/alphanumeric segments;
+# its default comes first so ties keep the usual encoding
+SEGMENT_THRESHOLDS = (20, 0, 8, 12)
+
+
+def make_qr_code(ssid, password, authentication_type='WPA', hidden=False,
+                 error_correction=DEFAULT_ERROR_CORRECTION, border=DEFAULT_BORDER):
+    """Encode a network at the smallest QR version its payload fits.
+
+    The version is the smallest that holds the payload at this error correction
+    level. Several segmentations of the payload are sized with best_fit(), which
+    is cheap, and only the smallest one is laid out and masked.
+    """
+    payload = encode_wifi_payload(ssid, password, authentication_type, hidden)
+    best = None
+    for threshold in SEGMENT_THRESHOLDS:
+        qr_code = qrcode.QRCode(error_correction=ERROR_CORRECTION_LEVELS[error_correction], border=border)
+        qr_code.add_data(payload, optimize=threshold)
+        if best is None or qr_code.best_fit() < best.version:
+            best = qr_code
+    best.make(fit=False)
+    return best
+
+
+@lru_cache(maxsize=256)
+def qr_matrix(ssid, password, authentication_type='WPA', hidden=False,
+              error_correction=DEFAULT_ERROR_CORRECTION, border=DEFAULT_BORDER):
+    """Encode a network once and return its module matrix (quiet zone included) as nested tuples"""
+    qr_code = make_qr_code(ssid, password, authentication_type, hidden, error_correction, border)
+    return tuple(tuple(row) for row in qr_code.get_matrix())
+
+
+def describe_matrix(matrix, border=DEFAULT_BORDER):
+    """Version and size of an encoded matrix, for showing next to the code"""
+    modules = len(matrix) - 2 * border
+    return {
+        'version': (modules - 17) // 4,
+        'modules': modules,
+        'side': len(matrix),
+    }
+
+
+def rasterize_rgba(matrix, size_pixels):
+    """Scale a module matrix by the largest integer factor that fits size_pixels.
+
+    Nearest-neighbour only: every module becomes a solid scale x scale block, so
+    the result is as sharp as the matrix and needs no resampling filter.
+    Returns (rgba_bytes, side) for a side x side image, top row first.
+    """
+    scale = max(1, int(size_pixels) // len(matrix))
+    light = LIGHT_PIXEL * scale
+    dark = DARK_PIXEL * scale
+    rows = []
+    for row in matrix:
+        rows.append(b''.join([dark if module else light for module in row]) * scale)
+    return b''.join(rows), len(matrix) * scale
+
+
+def encode_png(matrix, size_pixels):
+    """Encode a module matrix as an 8-bit greyscale PNG, scaled like rasterize_rgba"""
+    scale = max(1, int(size_pixels) // len(matrix))
+    side = len(matrix) * scale
+    light = b'\xff' * scale
+    dark = b'\x00' * scale
+    rows = []
+    for row in matrix:
+        # Each scanline starts with filter type 0 (None)
+        line = b'\x00' + b''.join([dark if module else light for module in row])
+        rows.append(line * scale)
+
+    def chunk(kind, data):
+        body = kind + data
+        return struct.pack('>I', len(data)) + body + struct.pack('>I', zlib.crc32(body))
+
+    return b''.join((
+        b'\x89PNG\r\n\x1a\n',
+        chunk(b'IHDR', struct.pack('>IIBBBBB', side, side, 8, 0, 0, 0, 0)),
+        chunk(b'IDAT', zlib.compress(b''.join(rows), 6)),
+        chunk(b'IEND', b''),
+    ))
+
+
+def encode_svg(matrix, module_size=10):
+    """Encode a module matrix as an SVG with one path of horizontal runs of dark modules"""
+    commands = []
+    for y, row in enumerate(matrix):
+        x = 0
+        width = len(row)
+        while x < width:
+            if not row[x]:
+                x += 1
+                continue
+            start = x
+            while x < width and row[x]:
+                x += 1
+            commands.append(f'M{start},{y}h{x - start}v1h{start - x}z')
+    side = len(matrix)
+    pixels = side * module_size
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{pixels}" height="{pixels}" '
+        f'viewBox="0 0 {side} {side}" shape-rendering="crispEdges">'
+        f'<rect width="{side}" height="{side}" fill="#fff"/>'
+        f'<path fill="#000" d="{"".join(commands)}"/></svg>'
+    ).encode('utf-8')
@@ -0,0 +1,115 @@
+import time
+
+from wifi_payload import parse_wifi_config
+
+
+class Track:
+    """One code followed across frames"""
+    __slots__ = ('payload', 'box', 'sightings', 'first_seen', 'last_seen', 'confirmed')
+
+    def __init__(self, payload, box, now):
+        self.payload = payload
+        self.box = box
+        self.sightings = 1
+        self.first_seen = now
+        self.last_seen = now
+        self.confirmed = False
+
+
+def box_center(box):
+    x0, y0, x1, y1 = box
+    return (x0 + x1) / 2, (y0 + y1) / 2
+
+
+class SightingTracker:
+    """Deduplicate decoded codes across frames and confirm them after repeated sightings.
+
+    A detection continues a track when it has the same payload and its box
+    centre is within max_distance of where the track was last seen (a fraction
+    of the code's size, so it scales with distance to the camera). A track
+    unseen for ttl seconds is dropped. Once a track reaches `confirmations`
+    sightings its payload is parsed, once, and reported; a payload that was
+    confirmed is not reported again until reset().
+    """
+
+    def __init__(self, confirmations=3, ttl=1.0, max_distance=0.5, prefix='WIFI:', clock=time.monotonic):
+        self.confirmations = confirmations
+        self.ttl = ttl
+        self.max_distance = max_distance
+        self.prefix = prefix
+        self.clock = clock
+        self.tracks = {}
+        self.confirmed = {}
+        self.sightings = 0
+        self.ignored = 0
+        self.invalid = 0
+
+    def reset(self):
+        self.tracks.clear()
+        self.confirmed.clear()
+        self.invalid = 0
+
+    def update(self, detections):
+        """Feed one frame's detections; return [(payload, wifi_config, box)] confirmed by this frame"""
+        now = self.clock()
+        self._expire(now)
+        newly_confirmed = []
+        for detection in detections:
+            payload = detection.text
+            if payload in self.confirmed:
+                continue
+            # Case-insensitive, like parse_wifi_config
+            if payload[:len(self.prefix)].upper() != self.prefix.upper():
+                self.ignored += 1
+                continue
+            self.sightings += 1
+            track = self._match(payload, detection.box)
+            if track is None:
+                track = Track(payload, detection.box, now)
+                self.tracks.setdefault(payload, []).append(track)
+            else:
+                track.sightings += 1
+                track.box = detection.box
+                track.last_seen = now
+            if track.sightings >= self.confirmations and not track.confirmed:
+                track.confirmed = True
+                try:
+                    wifi_config = parse_wifi_config(payload)
+                except ValueError:
+                    # Keep the payload so a bad code isn't re-parsed every frame
+                    self.invalid += 1
+                    self.confirmed[payload] = None
+                    continue
+                self.confirmed[payload] = wifi_config
+                newly_confirmed.append((payload, wifi_config, detection.box))
+        return newly_confirmed
+
+    def stats(self):
+        # Only len() and counters, so another thread can call this while update() runs
+        return {
+            'tracked_payloads': len(self.tracks),
+            'confirmed': len(self.confirmed) - self.invalid,
+            'sightings': self.sightings,
+            'ignored': self.ignored,
+            'invalid': self.invalid,
+        }
+
+    def _match(self, payload, box):
+        cx, cy = box_center(box)
+        limit = self.max_distance * max(box[2] - box[0], box[3] - box[1], 1)
+        best = None
+        best_distance = limit
+        for track in self.tracks.get(payload, ()):
+            tx, ty = box_center(track.box)
+            distance = ((cx - tx) ** 2 + (cy - ty) ** 2) ** 0.5
+            if distance <= best_distance:
+                best, best_distance = track, distance
+        return best
+
+    def _expire(self, now):
+        for payload in list(self.tracks):
+            live = [t for t in self.tracks[payload] if now - t.last_seen <= self.ttl]
+            if live:
+                self.tracks[payload] = live
+            else:
+                del self.tracks[payload]
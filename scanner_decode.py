@@ -0,0 +1,148 @@
+from collections import namedtuple
+
+import cv2
+import zxingcpp
+
+# box is (x0, y0, x1, y1) in full-frame pixel coordinates
+Detection = namedtuple('Detection', 'text box')
+
+
+def read_qr_codes(gray, offset=(0, 0), scale=1.0):
+    """Decode QR codes in a grayscale image, mapping their boxes back to the full frame"""
+    detections = []
+    for result in zxingcpp.read_barcodes(gray, formats=zxingcpp.BarcodeFormat.QRCode):
+        position = result.position
+        points = (position.top_left, position.top_right, position.bottom_right, position.bottom_left)
+        xs = [p.x for p in points]
+        ys = [p.y for p in points]
+        box = (
+            int(min(xs) / scale) + offset[0],
+            int(min(ys) / scale) + offset[1],
+            int(max(xs) / scale) + offset[0],
+            int(max(ys) / scale) + offset[1],
+        )
+        detections.append(Detection(result.text, box))
+    return detections
+
+
+class AdaptiveDecoder:
+    """Cheap-first QR decoding for a live camera feed.
+
+    Each frame is converted to grayscale once. The region where a code was last
+    found is searched first, then a downscaled copy of the frame. Full resolution
+    is only used around a candidate region found by the QR detector in the
+    downscaled pass. While the scene is static and nothing decodes, frames are
+    skipped at an exponentially growing interval; any motion resets it.
+
+    With multi=True every frame gets the downscaled pass, since a hit in the
+    last region says nothing about other codes in view, and the full-resolution
+    fallback decodes every candidate the detector finds.
+    """
+
+    def __init__(self, max_side=640, roi_margin=0.25, motion_threshold=2.0,
+                 max_interval=8, roi_patience=5, multi=False):
+        self.multi = multi
+        self.max_side = max_side
+        self.roi_margin = roi_margin
+        self.motion_threshold = motion_threshold
+        self.max_interval = max_interval
+        self.roi_patience = roi_patience
+        self.last_roi = None
+        self.interval = 1
+        self.frames = 0
+        self.skipped = 0
+        self.roi_hits = 0
+        self.downscaled_hits = 0
+        self.full_res_passes = 0
+        self._countdown = 0
+        self._roi_misses = 0
+        self._thumb = None
+        self._detector = cv2.QRCodeDetector()
+
+    def __call__(self, frame):
+        self.frames += 1
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if not self._should_decode(gray):
+            self.skipped += 1
+            return []
+
+        detections = self._decode(gray)
+        if detections:
+            # A static frame that decodes keeps being decoded every frame
+            self.interval = 1
+            self._countdown = 0
+            self._roi_misses = 0
+            self.last_roi = self._expand(detections[0].box, gray.shape)
+        elif self.last_roi is not None:
+            self._roi_misses += 1
+            if self._roi_misses >= self.roi_patience:
+                self.last_roi = None
+        return detections
+
+    def stats(self):
+        return {
+            'frames': self.frames,
+            'skipped': self.skipped,
+            'roi_hits': self.roi_hits,
+            'downscaled_hits': self.downscaled_hits,
+            'full_res_passes': self.full_res_passes,
+            'interval': self.interval,
+        }
+
+    def _should_decode(self, gray):
+        thumb = cv2.resize(gray, (32, 24), interpolation=cv2.INTER_AREA)
+        static = self._thumb is not None and cv2.absdiff(thumb, self._thumb).mean() < self.motion_threshold
+        self._thumb = thumb
+        if not static:
+            self.interval = 1
+            self._countdown = 0
+            return True
+        if self._countdown > 0:
+            self._countdown -= 1
+            return False
+        # Decode this static frame, then wait longer before the next attempt
+        self._countdown = self.interval - 1
+        self.interval = min(self.interval * 2, self.max_interval)
+        return True
+
+    def _decode(self, gray):
+        if self.last_roi is not None and not self.multi:
+            x0, y0, x1, y1 = self.last_roi
+            detections = read_qr_codes(gray[y0:y1, x0:x1], offset=(x0, y0))
+            if detections:
+                self.roi_hits += 1
+                return detections
+
+        height, width = gray.shape
+        scale = min(1.0, self.max_side / max(height, width))
+        small = gray if scale == 1.0 else cv2.resize(gray, None, fx=scale, fy=scale,
+                                                     interpolation=cv2.INTER_AREA)
+        detections = read_qr_codes(small, scale=scale)
+        if detections:
+            self.downscaled_hits += 1
+            return detections
+        if scale == 1.0:
+            return []
+
+        if self.multi:
+            found, points = self._detector.detectMulti(small)
+        else:
+            found, points = self._detector.detect(small)
+        if not found or points is None:
+            return []
+        detections = []
+        for candidate in points.reshape(-1, 4, 2) / scale:
+            box = (int(candidate[:, 0].min()), int(candidate[:, 1].min()),
+                   int(candidate[:, 0].max()), int(candidate[:, 1].max()))
+            x0, y0, x1, y1 = self._expand(box, gray.shape)
+            self.full_res_passes += 1
+            detections.extend(read_qr_codes(gray[y0:y1, x0:x1], offset=(x0, y0)))
+        return detections
+
+    def _expand(self, box, shape):
+        x0, y0, x1, y1 = box
+        margin_x = int((x1 - x0) * self.roi_margin) + 8
+        margin_y = int((y1 - y0) * self.roi_margin) + 8
+        height, width = shape[:2]
+        return (max(0, x0 - margin_x), max(0, y0 - margin_y),
+                min(width, x1 + margin_x), min(height, y1 + margin_y))
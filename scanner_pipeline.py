@@ -0,0 +1,281 @@
+import logging
+import threading
+import time
+
+import numpy as np
+
+from metrics import METRICS
+
+log = logging.getLogger(__name__)
+
+
+class PooledFrame:
+    """A reusable frame buffer that returns to its pool once every holder releases it"""
+
+    def __init__(self, pool, array):
+        self.pool = pool
+        self.array = array
+        self._refs = 0
+
+    def retain(self):
+        with self.pool.lock:
+            self._refs += 1
+        return self
+
+    def release(self):
+        with self.pool.lock:
+            self._refs -= 1
+            if self._refs == 0:
+                self.pool.free.append(self)
+
+
+class FramePool:
+    """Preallocated frame buffers of one shape, handed out and returned without reallocating"""
+
+    def __init__(self, shape, dtype=np.uint8, count=6):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.lock = threading.Lock()
+        self.free = [PooledFrame(self, np.empty(self.shape, self.dtype)) for _ in range(count)]
+        self.allocated = count
+
+    def acquire(self):
+        with self.lock:
+            if self.free:
+                frame = self.free.pop()
+            else:
+                # Every buffer is held by a consumer; grow once rather than block capture
+                frame = PooledFrame(self, np.empty(self.shape, self.dtype))
+                self.allocated += 1
+            frame._refs = 1
+            return frame
+
+
+def _release(item):
+    if isinstance(item, PooledFrame):
+        item.release()
+
+
+class LatestFrameSlot:
+    """Single-item mailbox: a new frame replaces any frame nobody has taken yet"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._item = None
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if self._closed:
+                _release(item)
+                return
+            if self._item is not None:
+                self.dropped += 1
+                _release(self._item)
+            self._item = item
+            self._cond.notify()
+
+    def take(self, timeout=None):
+        """Wait for a frame; returns None on timeout or once the slot is closed"""
+        with self._cond:
+            if self._item is None and not self._closed:
+                self._cond.wait(timeout)
+            item, self._item = self._item, None
+            return item
+
+    def poll(self):
+        with self._cond:
+            item, self._item = self._item, None
+            return item
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def discard(self):
+        with self._cond:
+            item, self._item = self._item, None
+        _release(item)
+
+
+class ScanPipeline:
+    """Capture and decode frames on worker threads.
+
+    The capture thread reads from any cv2.VideoCapture-like source and publishes
+    each frame to two latest-frame-wins slots: one the UI polls for previews and
+    one the decode worker drains. A slow decoder therefore only ever sees the
+    newest frame and stale frames are dropped instead of queueing up.
+    on_result is called from the decode thread, so UI callers must marshal it
+    back onto their own thread.
+
+    Frames are read straight into buffers from a FramePool and shared between
+    the two slots as PooledFrame objects. Whoever takes a frame from a slot
+    must call release() when done with it.
+
+    Cameras drop frames now and then, especially while starting up, so a
+    failed read is retried. Capture only stops after max_failures failed reads
+    in a row or once the source is no longer open, and then sets error. A
+    source with a true `finite` attribute (a non-looping SyntheticFrameSource)
+    ends at its first failed read, which is end of stream rather than an error.
+    If decode raises, the exception is logged, both threads stop and error is
+    set the same way.
+    """
+
+    def __init__(self, source, decode, on_result, metrics=METRICS, max_failures=50, retry_delay=0.02):
+        self.source = source
+        self.decode = decode
+        self.on_result = on_result
+        self.metrics = metrics
+        self.max_failures = max_failures
+        self.retry_delay = retry_delay
+        self.preview = LatestFrameSlot()
+        self.pending_decode = LatestFrameSlot()
+        self.frames_captured = 0
+        self.frames_decoded = 0
+        self.source_ended = False
+        self.read_failures = 0
+        self.error = None
+        self.pool = None
+        self._stop = threading.Event()
+        self._threads = []
+
+    @property
+    def frames_dropped(self):
+        return self.pending_decode.dropped
+
+    def start(self):
+        self._threads = [
+            threading.Thread(target=self._capture_loop, name='scan-capture', daemon=True),
+            threading.Thread(target=self._decode_loop, name='scan-decode', daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout=1.0):
+        self._stop.set()
+        self.preview.close()
+        self.pending_decode.close()
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout)
+        self._threads = []
+        self.preview.discard()
+        self.pending_decode.discard()
+        self.source.release()
+
+    def _read_frame(self):
+        if self.pool is None:
+            ok, array = self.source.read()
+            if ok:
+                self.pool = FramePool(array.shape, array.dtype)
+                frame = self.pool.acquire()
+                frame.array[...] = array
+                return frame
+            return None
+
+        frame = self.pool.acquire()
+        ok, array = self.source.read(frame.array)
+        if not ok:
+            frame.release()
+            return None
+        if array is not frame.array:
+            # The source changed resolution and allocated its own array
+            frame.release()
+            self.pool = FramePool(array.shape, array.dtype)
+            frame = self.pool.acquire()
+            frame.array[...] = array
+        return frame
+
+    def _capture_loop(self):
+        failures = 0
+        while not self._stop.is_set():
+            with self.metrics.timer('camera_read'):
+                frame = self._read_frame()
+            if frame is None:
+                failures += 1
+                self.read_failures += 1
+                if getattr(self.source, 'finite', False):
+                    self._end()
+                    return
+                if not self.source.isOpened():
+                    self._end("Camera closed")
+                    return
+                if failures >= self.max_failures:
+                    self._end(f"Camera stopped sending frames ({failures} failed reads)")
+                    return
+                self._stop.wait(self.retry_delay)
+                continue
+            failures = 0
+            self.frames_captured += 1
+            frame.retain()
+            self.preview.put(frame)
+            self.pending_decode.put(frame)
+
+    def _end(self, error=None):
+        self.error = error
+        self.source_ended = True
+        self.pending_decode.close()
+
+    def _decode_loop(self):
+        while not self._stop.is_set():
+            frame = self.pending_decode.take(timeout=0.1)
+            if frame is None:
+                if self.source_ended:
+                    return
+                continue
+            try:
+                with self.metrics.timer('barcode_decode'):
+                    results = self.decode(frame.array)
+            except Exception as e:
+                log.exception("Barcode decode failed: %s", e)
+                # Stop capture as well, so the UI stops getting previews and shows the error
+                self._stop.set()
+                self._end(f"Barcode decode failed: {e}")
+                return
+            finally:
+                frame.release()
+            self.frames_decoded += 1
+            self.metrics.tick('decode')
+            if results:
+                self.on_result(results)
+
+
+class SyntheticFrameSource:
+    """Stand-in for cv2.VideoCapture that replays frames at a fixed rate"""
+
+    def __init__(self, frames, fps=30.0, loop=False):
+        self.frames = list(frames)
+        self.interval = 1.0 / fps if fps else 0.0
+        self.loop = loop
+        # A failed read means the frames ran out, not a dropped camera frame
+        self.finite = not loop
+        self._index = 0
+        self._opened = True
+        self._next_time = time.monotonic()
+
+    def isOpened(self):
+        return self._opened
+
+    def read(self, image=None):
+        if not self._opened or not self.frames:
+            return False, None
+        if self._index >= len(self.frames):
+            if not self.loop:
+                return False, None
+            self._index = 0
+        delay = self._next_time - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self._next_time = max(self._next_time, time.monotonic()) + self.interval
+        frame = self.frames[self._index]
+        self._index += 1
+        # Like cv2.VideoCapture.read, fill the caller's buffer when it fits
+        if image is not None and image.shape == frame.shape and image.dtype == frame.dtype:
+            image[...] = frame
+            return True, image
+        return True, frame.copy()
+
+    def release(self):
+        self._opened = False
@@ -0,0 +1,136 @@
+import argparse
+import csv
+import os
+import secrets
+import sys
+from array import array
+
+from wifi_core import lazy_singleton
+
+# SSIDs are limited to 32 bytes of UTF-8
+SSID_BYTE_BUDGET = 32
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+SINGLE_CSV = os.path.join(DATA_DIR, 'single.csv')
+COMBOS_CSV = os.path.join(DATA_DIR, 'combos.csv')
+
+
+def read_csv_column(path, column):
+    if not os.path.exists(path):
+        return []
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = csv.reader(f)
+        next(rows, None)
+        return [row[column].strip() for row in rows if len(row) > column and row[column].strip()]
+
+
+def load_emoji_sequences(single_csv=SINGLE_CSV, combos_csv=COMBOS_CSV):
+    """Every fully-qualified emoji from emoji.EMOJI_DATA plus those used in the CSV files"""
+    import emoji
+
+    fully_qualified = emoji.STATUS['fully_qualified']
+    sequences = {e for e, data in emoji.EMOJI_DATA.items() if data.get('status') == fully_qualified}
+    sequences.update(read_csv_column(single_csv, 0))
+    # combos.csv holds several emoji per name; split them into single sequences
+    for combo in read_csv_column(combos_csv, 1):
+        sequences.update(match['emoji'] for match in emoji.emoji_list(combo))
+    return sequences
+
+
+class SSIDIndex:
+    """Emoji sequences sorted by UTF-8 byte length with a cumulative count per length.
+
+    prefix_counts[n] is the number of sequences that are at most n bytes long,
+    so a uniform pick among all sequences that fit a byte limit is a single
+    random index below prefix_counts[limit].
+    """
+
+    def __init__(self, sequences, byte_lengths=None):
+        if byte_lengths is None:
+            sequences = sorted(set(sequences), key=lambda s: (len(s.encode('utf-8')), s))
+            byte_lengths = array('B', (len(s.encode('utf-8')) for s in sequences))
+        # Otherwise sequences must already be in (byte length, text) order
+        self.sequences = sequences
+        self.byte_lengths = byte_lengths
+        if not self.sequences:
+            raise ValueError("No emoji sequences to build an SSID index from")
+        self.min_bytes = self.byte_lengths[0]
+        self.max_bytes = self.byte_lengths[-1]
+        self.prefix_counts = array('I', [0] * (self.max_bytes + 1))
+        for length in self.byte_lengths:
+            self.prefix_counts[length] += 1
+        for length in range(1, self.max_bytes + 1):
+            self.prefix_counts[length] += self.prefix_counts[length - 1]
+
+    @classmethod
+    def from_compiled(cls, compiled):
+        """Build from a catalog_cache.CompiledCatalog; its sequences are stored pre-sorted"""
+        return cls(compiled.strings('sequences'), compiled.array('sequences.byte_lengths'))
+
+    def __len__(self):
+        return len(self.sequences)
+
+    def count_fitting(self, limit):
+        if limit < 0:
+            return 0
+        return self.prefix_counts[min(limit, self.max_bytes)]
+
+    def generate(self, count=3, budget=SSID_BYTE_BUDGET, separator=''):
+        """Draw count emoji whose UTF-8 encoding, with separators, fits in budget bytes"""
+        if count < 1:
+            raise ValueError("count must be at least 1")
+        sep_bytes = len(separator.encode('utf-8'))
+        if count * self.min_bytes + (count - 1) * sep_bytes > budget:
+            raise ValueError(f"{count} emoji cannot fit in {budget} bytes")
+
+        parts = []
+        remaining = budget
+        for slot in range(count):
+            if slot:
+                remaining -= sep_bytes
+            # Leave room for the shortest possible emoji in every later slot
+            limit = remaining - (count - slot - 1) * (self.min_bytes + sep_bytes)
+            index = secrets.randbelow(self.count_fitting(limit))
+            parts.append(self.sequences[index])
+            remaining -= self.byte_lengths[index]
+        return separator.join(parts)
+
+    def generate_unique(self, total, count=3, budget=SSID_BYTE_BUDGET, separator='', max_attempts=None):
+        """Yield up to total distinct SSIDs; stops early if the space looks exhausted"""
+        seen = set()
+        attempts = 0
+        max_attempts = max_attempts or total * 20
+        while len(seen) < total and attempts < max_attempts:
+            attempts += 1
+            ssid = self.generate(count, budget, separator)
+            if ssid not in seen:
+                seen.add(ssid)
+                yield ssid
+
+
+@lazy_singleton
+def get_ssid_index():
+    from catalog_cache import get_compiled_catalog
+    return SSIDIndex.from_compiled(get_compiled_catalog())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate multi-emoji SSIDs that fit a byte budget.")
+    parser.add_argument('-n', '--number', type=int, default=1, help="how many unique SSIDs (default: 1)")
+    parser.add_argument('-k', '--emoji', type=int, default=3, help="emoji per SSID (default: 3)")
+    parser.add_argument('--budget', type=int, default=SSID_BYTE_BUDGET,
+                        help=f"maximum UTF-8 bytes (default: {SSID_BYTE_BUDGET})")
+    parser.add_argument('--separator', default='', help="text placed between emoji")
+    args = parser.parse_args()
+
+    index = get_ssid_index()
+    produced = 0
+    for ssid in index.generate_unique(args.number, args.emoji, args.budget, args.separator):
+        sys.stdout.write(ssid + '\n')
+        produced += 1
+    if produced < args.number:
+        print(f"Only {produced} unique SSIDs found for these settings.", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
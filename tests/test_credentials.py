@@ -0,0 +1,40 @@
+import pytest
+
+import credentials
+from credentials import ALPHABET, CHAR_SETS, generate_wpa3_passwords
+
+
+@pytest.fixture(params=['numpy', 'pure python'])
+def backend(request, monkeypatch):
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+        credentials._covered_rows = None
+        assert credentials.batch_backend() == 'numpy'
+    else:
+        monkeypatch.setattr(credentials, '_covered_rows', credentials._covered_rows_python)
+    return request.param
+
+
+@pytest.mark.parametrize('length', [8, 9, 20, 62, 63])
+def test_batch_covers_every_class(backend, length):
+    passwords = generate_wpa3_passwords(500, length)
+    assert len(passwords) == 500
+    for password in passwords:
+        assert len(password) == length
+        assert set(password) <= set(ALPHABET)
+        assert all(not set(password).isdisjoint(chars) for chars in CHAR_SETS), password
+
+
+def test_batch_of_zero(backend):
+    assert generate_wpa3_passwords(0) == []
+
+
+@pytest.mark.parametrize('length', [0, 7, 64])
+def test_batch_rejects_bad_length(length):
+    with pytest.raises(ValueError):
+        generate_wpa3_passwords(1, length)
+
+
+def test_batch_rejects_negative_count():
+    with pytest.raises(ValueError):
+        generate_wpa3_passwords(-1)
@@ -0,0 +1,73 @@
+from collections import namedtuple
+
+import pytest
+
+from scan_tracker import SightingTracker
+
+Detection = namedtuple('Detection', 'text box')
+
+PAYLOAD = 'WIFI:T:WPA;S:Cafe;P:hunter22;;'
+BOX = (100, 100, 200, 200)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def see(tracker, clock, *detections, dt=0.1):
+    clock.now += dt
+    return tracker.update(list(detections))
+
+
+def test_confirms_after_n_sightings(clock):
+    tracker = SightingTracker(confirmations=3, clock=clock)
+    assert see(tracker, clock, Detection(PAYLOAD, BOX)) == []
+    assert see(tracker, clock, Detection(PAYLOAD, (110, 105, 210, 205))) == []
+    confirmed = see(tracker, clock, Detection(PAYLOAD, (115, 110, 215, 210)))
+    assert [(payload, config['ssid'], config['password']) for payload, config, _ in confirmed] == [
+        (PAYLOAD, 'Cafe', 'hunter22')
+    ]
+    # A confirmed payload is reported once, until reset()
+    assert see(tracker, clock, Detection(PAYLOAD, BOX)) == []
+    tracker.reset()
+    assert [see(tracker, clock, Detection(PAYLOAD, BOX)) != [] for _ in range(3)] == [False, False, True]
+
+
+def test_distant_boxes_are_separate_tracks(clock):
+    tracker = SightingTracker(confirmations=3, clock=clock)
+    far = (600, 100, 700, 200)
+    # Alternating between two far-apart copies never gives one track three sightings
+    assert see(tracker, clock, Detection(PAYLOAD, BOX)) == []
+    assert see(tracker, clock, Detection(PAYLOAD, far)) == []
+    assert see(tracker, clock, Detection(PAYLOAD, BOX)) == []
+    assert len(tracker.tracks[PAYLOAD]) == 2
+    assert [track.sightings for track in tracker.tracks[PAYLOAD]] == [2, 1]
+    assert len(see(tracker, clock, Detection(PAYLOAD, BOX))) == 1
+
+
+def test_tracks_expire_after_ttl(clock):
+    tracker = SightingTracker(confirmations=3, ttl=1.0, clock=clock)
+    see(tracker, clock, Detection(PAYLOAD, BOX))
+    see(tracker, clock, Detection(PAYLOAD, BOX))
+    # Out of sight for longer than ttl: the next sighting starts over
+    see(tracker, clock, dt=1.5)
+    assert tracker.tracks == {}
+    assert see(tracker, clock, Detection(PAYLOAD, BOX)) == []
+    assert see(tracker, clock, Detection(PAYLOAD, BOX)) == []
+    assert len(see(tracker, clock, Detection(PAYLOAD, BOX))) == 1
+
+
+def test_prefix_is_case_insensitive(clock):
+    tracker = SightingTracker(confirmations=1, clock=clock)
+    confirmed = see(tracker, clock, Detection('wifi:S:Lower;T:nopass;;', BOX), Detection('https://example.com', BOX))
+    assert [config['ssid'] for _, config, _ in confirmed] == ['Lower']
+    assert tracker.stats()['ignored'] == 1
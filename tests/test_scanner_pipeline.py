@@ -0,0 +1,46 @@
+import numpy as np
+
+from metrics import Metrics
+from scanner_pipeline import ScanPipeline, SyntheticFrameSource
+
+
+def make_frames(count):
+    return [np.full((8, 8, 3), index, dtype=np.uint8) for index in range(count)]
+
+
+def run_to_completion(pipeline):
+    pipeline.start()
+    for thread in pipeline._threads:
+        thread.join(5)
+        assert not thread.is_alive()
+    pipeline.stop()
+
+
+def test_runs_synthetic_source_to_completion():
+    results = []
+
+    def decode(array):
+        return [int(array[0, 0, 0])]
+
+    pipeline = ScanPipeline(SyntheticFrameSource(make_frames(40), fps=0), decode, results.extend, metrics=Metrics())
+    run_to_completion(pipeline)
+
+    assert pipeline.error is None
+    assert pipeline.source_ended
+    assert pipeline.frames_captured == 40
+    assert 1 <= pipeline.frames_decoded <= 40
+    assert pipeline.frames_decoded + pipeline.frames_dropped == 40
+    assert results == sorted(results) and results[-1] == 39
+    assert len(pipeline.pool.free) == pipeline.pool.allocated
+
+
+def test_decode_error_stops_pipeline():
+    def decode(array):
+        raise RuntimeError("decoder crashed")
+
+    pipeline = ScanPipeline(SyntheticFrameSource(make_frames(5), fps=0, loop=True), decode, None, metrics=Metrics())
+    run_to_completion(pipeline)
+
+    assert pipeline.error == "Barcode decode failed: decoder crashed"
+    assert pipeline.frames_decoded == 0
+    assert len(pipeline.pool.free) == pipeline.pool.allocated
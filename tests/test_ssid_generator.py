@@ -0,0 +1,38 @@
+import pytest
+
+from ssid_generator import SSID_BYTE_BUDGET, SSIDIndex, load_emoji_sequences
+
+
+@pytest.fixture(scope='module')
+def index():
+    pytest.importorskip('emoji')
+    return SSIDIndex(load_emoji_sequences())
+
+
+@pytest.mark.parametrize('count', [1, 2, 3, 5, 8, 10])
+def test_ssids_fit_byte_budget(index, count):
+    for _ in range(2000):
+        ssid = index.generate(count)
+        assert len(ssid.encode('utf-8')) <= SSID_BYTE_BUDGET, ssid
+
+
+def test_ssids_with_separator_fit_byte_budget(index):
+    for _ in range(2000):
+        assert len(index.generate(4, separator='·').encode('utf-8')) <= SSID_BYTE_BUDGET
+
+
+def test_rejects_more_emoji_than_fit(index):
+    # The shortest emoji take 3 bytes, so 11 need at least 33
+    assert index.min_bytes == 3
+    with pytest.raises(ValueError):
+        index.generate(11)
+
+
+def test_mixed_lengths_fit_small_budget():
+    # A 4-byte and a 29-byte sequence: only the short one fits twice in 12 bytes
+    index = SSIDIndex(['😀', '👨‍👩‍👧‍👦' + '🏳'])
+    assert index.min_bytes == 4
+    for _ in range(200):
+        assert index.generate(2, budget=12) == '😀😀'
+    with pytest.raises(ValueError):
+        index.generate(4, budget=15)
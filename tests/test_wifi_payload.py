@@ -0,0 +1,93 @@
+import random
+
+import pytest
+
+from wifi_payload import encode_wifi_payload, parse_wifi_config, parse_wifi_configs
+
+# Heavy on the characters that need escaping
+ALPHABET = 'abcXYZ019 ;,:"\\\'📶🏠✨-_'
+AUTH_TYPES = ('WPA', 'WEP', 'nopass')
+
+
+def random_network(rng):
+    auth = rng.choice(AUTH_TYPES)
+    ssid = ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(1, 16)))
+    password = None
+    if auth != 'nopass':
+        password = ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(8, 63)))
+    return ssid, password, auth, rng.random() < 0.2
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_random_round_trip(seed):
+    rng = random.Random(seed)
+    for _ in range(2000):
+        ssid, password, auth, hidden = network = random_network(rng)
+        payload = encode_wifi_payload(*network)
+        assert parse_wifi_config(payload) == {
+            'ssid': ssid, 'password': password, 'security_type': auth, 'hidden': hidden,
+        }, payload
+
+
+@pytest.mark.parametrize('value', ['\\', '\\\\', '"', '";', 'a\\;b', ';;;', 'end\\'])
+def test_round_trip_escapes(value):
+    config = parse_wifi_config(encode_wifi_payload(value, value + 'padding'))
+    assert config['ssid'] == value
+    assert config['password'] == value + 'padding'
+
+
+@pytest.mark.parametrize('payload, expected', [
+    # Samsung order, unquoted
+    ('WIFI:S:home;P:secret12;T:WPA;H:false;;',
+     {'ssid': 'home', 'password': 'secret12', 'security_type': 'WPA', 'hidden': False}),
+    # Quoted values may contain unescaped ';'
+    ('WIFI:S:"my;net";P:"pa;ss";T:WPA;H:true;;',
+     {'ssid': 'my;net', 'password': 'pa;ss', 'security_type': 'WPA', 'hidden': True}),
+    # An escaped backslash right before the closing quote
+    ('WIFI:T:WPA;S:abc;P:"abc\\\\";;',
+     {'ssid': 'abc', 'password': 'abc\\', 'security_type': 'WPA', 'hidden': False}),
+    # An escaped quote followed by ';' does not close the value
+    ('WIFI:T:WPA;S:abc;P:"ab\\";c";;',
+     {'ssid': 'abc', 'password': 'ab";c', 'security_type': 'WPA', 'hidden': False}),
+    # A quote inside the value that isn't followed by ';'
+    ('WIFI:S:"say "hi"";T:WPA;;',
+     {'ssid': 'say "hi"', 'password': None, 'security_type': 'WPA', 'hidden': False}),
+    # The closing quote is the last character of a payload without ';;'
+    ('WIFI:T:nopass;S:"cafe"',
+     {'ssid': 'cafe', 'password': None, 'security_type': 'nopass', 'hidden': False}),
+    # Lower-case keys and a missing WIFI: prefix
+    ('s:net;p:pw12345678;t:WEP;h:TRUE;;',
+     {'ssid': 'net', 'password': 'pw12345678', 'security_type': 'WEP', 'hidden': True}),
+    # A trailing backslash escapes nothing
+    ('WIFI:S:abc\\',
+     {'ssid': 'abc', 'password': None, 'security_type': None, 'hidden': False}),
+])
+def test_hand_written_payloads(payload, expected):
+    assert parse_wifi_config(payload) == expected
+
+
+@pytest.mark.parametrize('auth', [None, '', 'nopass'])
+def test_open_network_has_no_password(auth):
+    payload = encode_wifi_payload('Guest', 'ignored', auth)
+    assert payload == 'WIFI:T:nopass;S:Guest;;'
+    assert parse_wifi_config(payload)['password'] is None
+
+
+def test_unterminated_quote_is_read_unquoted():
+    config = parse_wifi_config('WIFI:S:"open;P:pw;;')
+    assert config['ssid'] == '"open'
+    assert config['password'] == 'pw'
+
+
+def test_missing_ssid_is_rejected():
+    with pytest.raises(ValueError):
+        parse_wifi_config('WIFI:T:WPA;P:secret;;')
+    with pytest.raises(ValueError):
+        encode_wifi_payload('')
+
+
+def test_parse_many_skips_invalid():
+    payloads = ['WIFI:S:a;;', 'WIFI:P:x;;', 'WIFI:S:b;;']
+    assert [c['ssid'] for c in parse_wifi_configs(payloads)] == ['a', 'b']
+    with pytest.raises(ValueError):
+        parse_wifi_configs(payloads, skip_invalid=False)
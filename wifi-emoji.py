@@ -6,30 +6,35 @@ from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.label import Label
 from kivy.uix.button import Button
 from kivy.uix.image import Image
+from kivy.uix.widget import Widget
 from kivy.uix.slider import Slider
 from kivy.uix.textinput import TextInput
+from kivy.uix.togglebutton import ToggleButton
+from kivy.uix.spinner import Spinner
 from kivy.uix.popup import Popup
-from kivy.uix.scrollview import ScrollView
 from kivy.uix.gridlayout import GridLayout
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recyclegridlayout import RecycleGridLayout
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
 from kivy.core.clipboard import Clipboard
+from kivy.graphics import Color, Rectangle
 from kivy.graphics.texture import Texture
 from kivy.properties import StringProperty, NumericProperty, ObjectProperty, BooleanProperty
-from kivy.metrics import inch, dp
+from kivy.metrics import inch, dp, sp
 from kivy.core.text import LabelBase
 from kivy.config import Config
-from kivy.clock import Clock
-import io
-import secrets
-import string
-import emoji
-from wifi_qrcode_generator import generator
-from PIL import Image as PILImage
+from kivy.clock import Clock, mainthread
 from functools import partial
 import logging
-import cv2
-import zxingcpp
-import numpy as np
-import re
+import time
+from credential_pool import CredentialPool
+from emoji_fonts import GlyphAtlas, resolve_emoji_font
+from emoji_search import get_search_index
+from history_store import HistoryStore, unissued
+from metrics import METRICS, MetricsDumper
+import qr_render
+from scan_tracker import SightingTracker
+from wifi_core import COMMON_EMOJIS, WiFiUtils
 
 # Configure logging and window settings
 Config.set('kivy', 'log_level', 'critical')
@@ -37,77 +42,146 @@ logging.getLogger('kivy').setLevel(logging.CRITICAL)
 Config.set('graphics', 'minimum_width', '600')
 Config.set('graphics', 'minimum_height', '500')
 
-# Common emojis to choose from
-COMMON_EMOJIS = ["📶", "🏠", "💻", "📱", "🔒", "🌐", "🚀", "✨", "🔑", "🛡️"]
+log = logging.getLogger('wifi_emoji')
+
+# Set to a file path to append a JSON-lines metrics snapshot every few seconds
+METRICS_PATH = os.environ.get('EMOJI_WIFI_METRICS')
+METRICS_INTERVAL = float(os.environ.get('EMOJI_WIFI_METRICS_INTERVAL', '10'))
+
+# Consistent sightings needed before a scanned code is accepted
+SCAN_CONFIRMATIONS = 3
+
+# Passwords with their QR buffers made ahead for the current settings
+CREDENTIAL_POOL_SIZE = 4
+
+# Choices for swapping in a new password on a timer, e.g. for a guest network
+ROTATION_INTERVALS = {
+    'Off': 0,
+    '15 min': 15 * 60,
+    '1 hour': 60 * 60,
+    '1 day': 24 * 60 * 60,
+}
 
 class EmojiFontManager:
     @staticmethod
-    def register_emoji_font():
-        emoji_font_paths = [
-            '/usr/share/fonts/truetype/noto/NotoColorEmoji.ttf',  # Linux
-            'C:/Windows/Fonts/seguiemj.ttf',  # Windows
-            '/System/Library/Fonts/Apple Color Emoji.ttc',  # Mac
-            '/Library/Fonts/Apple Color Emoji.ttc'  # Alternative Mac
-        ]
-        for path in emoji_font_paths:
-            try:
-                LabelBase.register(name='EmojiFont', fn_regular=path)
-                return True
-            except:
-                continue
+    def register_emoji_font(path):
+        # The path comes from resolve_emoji_font, which remembers it between launches
+        if path is None:
+            return False
         try:
-            LabelBase.register(name='EmojiFont', fn_regular='Arial')
-            return True
-        except:
+            LabelBase.register(name='EmojiFont', fn_regular=path)
+        except IOError as e:
+            log.warning("Can't register emoji font %s: %s", path, e)
             return False
+        return True
 
-emoji_font_available = EmojiFontManager.register_emoji_font()
+EMOJI_FONT_PATH, EMOJI_FONT_STRIKES = resolve_emoji_font()
+emoji_font_available = EmojiFontManager.register_emoji_font(EMOJI_FONT_PATH)
 
-class WiFiUtils:
-    @staticmethod
-    def get_random_emoji():
-        all_emojis = [c for c in emoji.EMOJI_DATA if len(c) == 1 and c not in ['️', '⃣']]
-        return secrets.choice(all_emojis) if all_emojis else "📶"
+class GlyphTextures:
+    """Kivy textures for the pages of a GlyphAtlas.
 
-    @staticmethod
-    def generate_wpa3_password(length=62):
-        if length < 8 or length > 63:
-            raise ValueError("Password must be 8-63 characters")
-        
-        special_chars = "!@$%^&*()-_=+[]{}|,.<>?`~"
-        char_sets = [string.ascii_lowercase, string.ascii_uppercase, string.digits, special_chars]
-        
-        while True:
-            password = [secrets.choice(s) for s in char_sets]
-            remaining = length - len(password)
-            all_chars = ''.join(char_sets)
-            password.extend(secrets.choice(all_chars) for _ in range(remaining))
-            secrets.SystemRandom().shuffle(password)
-            password = ''.join(password)
-            
-            # Validation checks
-            has_lower = any(c.islower() for c in password)
-            has_upper = any(c.isupper() for c in password)
-            has_digit = any(c.isdigit() for c in password)
-            has_special = any(not c.isalnum() for c in password)
-            
-            if has_lower and has_upper and has_digit and has_special:
-                return password
+    Runs added to the atlas are copied into their page's texture on the next
+    lookup, and the texture region for each run is kept, so a run already
+    drawn once costs a dict lookup. The atlas, and with it NumPy and Pillow,
+    is only created by the first lookup.
+    """
+    
+    def __init__(self, make_atlas):
+        self.make_atlas = make_atlas
+        self.atlas = None
+        self.textures = []
+        self.regions = {}
+        self.generation = 0
+    
+    def get(self, text, size):
+        key = (text, size)
+        texture = self.regions.get(key)
+        if texture is None:
+            if self.atlas is None:
+                self.atlas = self.make_atlas()
+                self.generation = self.atlas.generation
+            with METRICS.timer('glyph_raster'):
+                region = self.atlas.region(text, size)
+                if self.atlas.generation != self.generation:
+                    # The atlas was cleared; its pages are being refilled from the top
+                    self.generation = self.atlas.generation
+                    self.textures = []
+                    self.regions = {}
+                self.upload()
+                page = self.textures[region.page]
+                texture = page.get_region(region.x, page.height - region.y - region.height,
+                                          region.width, region.height)
+                self.regions[key] = texture
+        return texture
+    
+    def upload(self):
+        for region in self.atlas.take_pending():
+            while len(self.textures) <= region.page:
+                height, width = self.atlas.pages[len(self.textures)].shape[:2]
+                self.textures.append(Texture.create(size=(width, height), colorfmt='rgba'))
+            page = self.textures[region.page]
+            # Texture rows run bottom-up, atlas rows top-down
+            pixels = self.atlas.pixels(region)[::-1].tobytes()
+            page.blit_buffer(pixels, pos=(region.x, page.height - region.y - region.height),
+                             size=(region.width, region.height), colorfmt='rgba', bufferfmt='ubyte')
 
-    @staticmethod
-    def generate_qr_code(ssid, password, size_pixels):
-        qr_code = generator.wifi_qrcode(
-            ssid=ssid,
-            password=password,
-            authentication_type='WPA',
-            hidden=False
-        )
-        img = qr_code.make_image()
-        img = img.resize((size_pixels, size_pixels), PILImage.Resampling.LANCZOS)
-        img_bytes = io.BytesIO()
-        img.save(img_bytes, format='PNG')
-        img_bytes.seek(0)
-        return img_bytes
+# Shared by the chooser cells and the SSID display
+GLYPHS = GlyphTextures(partial(GlyphAtlas, EMOJI_FONT_PATH, EMOJI_FONT_STRIKES, color=(255, 255, 255, 255)))
+
+def fit_glyph(rectangle, widget, text, size):
+    """Draw text from the glyph atlas centred in widget, shrunk to fit its width"""
+    if not text:
+        rectangle.size = (0, 0)
+        return
+    texture = GLYPHS.get(text, int(size))
+    width, height = texture.size
+    scale = min(1, widget.width / width) if widget.width else 1
+    width, height = width * scale, height * scale
+    rectangle.texture = texture
+    rectangle.size = (width, height)
+    rectangle.pos = (widget.center_x - width / 2, widget.center_y - height / 2)
+
+class GlyphLabel(Widget):
+    """A single line of emoji drawn from the glyph atlas instead of laid out like a Label"""
+    text = StringProperty('')
+    glyph_size = NumericProperty(sp(20))
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        with self.canvas:
+            Color(1, 1, 1, 1)
+            self.glyph_rect = Rectangle(size=(0, 0))
+        # A timeout of 0 runs after the next frame, so the first window is
+        # drawn before the atlas (and NumPy and Pillow) is loaded
+        self.trigger_redraw = Clock.create_trigger(self.redraw, 0)
+        self.bind(pos=self.trigger_redraw, size=self.trigger_redraw,
+                  text=self.trigger_redraw, glyph_size=self.trigger_redraw)
+        self.trigger_redraw()
+    
+    def redraw(self, *args):
+        fit_glyph(self.glyph_rect, self, self.text, self.glyph_size)
+
+class EmojiCell(Button):
+    chooser = ObjectProperty(None, allownone=True)
+    glyph = StringProperty('')
+    glyph_size = NumericProperty(sp(20))
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        # Recycled cells only swap atlas regions when scrolling; no text is laid out
+        with self.canvas.after:
+            Color(1, 1, 1, 1)
+            self.glyph_rect = Rectangle(size=(0, 0))
+        self.bind(pos=self.redraw, size=self.redraw, glyph=self.redraw, glyph_size=self.redraw)
+        self.redraw()
+    
+    def redraw(self, *args):
+        fit_glyph(self.glyph_rect, self, self.glyph, self.glyph_size)
+    
+    def on_press(self):
+        if self.chooser:
+            self.chooser.choose_emoji(self.glyph)
 
 class EmojiChooser(Popup):
     def __init__(self, callback, **kwargs):
@@ -124,51 +198,77 @@ class EmojiChooser(Popup):
         
         emoji_grid = GridLayout(cols=10, spacing=dp(2), size_hint_y=None, height=dp(70))
         for emoji_char in COMMON_EMOJIS:
-            btn = Button(
-                text=emoji_char,
-                font_size='24sp',
-                font_name='EmojiFont' if emoji_font_available else None,
+            btn = EmojiCell(
+                glyph=emoji_char,
+                glyph_size=sp(24),
                 size_hint=(None, None),
                 size=(dp(32), dp(32)),
-                on_press=partial(self.choose_emoji, emoji_char)
+                chooser=self
             )
             emoji_grid.add_widget(btn)
         main_layout.add_widget(emoji_grid)
         
-        # All emojis section with scroll
-        all_label = Label(text="All Emojis:", size_hint_y=None, height=dp(30))
-        main_layout.add_widget(all_label)
+        # All emojis section with search and scroll
+        search_row = BoxLayout(size_hint_y=None, height=dp(36), spacing=dp(10))
+        self.all_label = Label(text="All Emojis:", size_hint_x=None, width=dp(120))
+        search_row.add_widget(self.all_label)
+        self.search_input = TextInput(
+            hint_text='Search by name, alias or description',
+            multiline=False
+        )
+        self.search_input.bind(text=self.on_search)
+        search_row.add_widget(self.search_input)
+        main_layout.add_widget(search_row)
         
-        scroll = ScrollView(do_scroll_x=False)
-        emoji_scroll_grid = GridLayout(cols=12, spacing=dp(2), size_hint_y=None, padding=dp(2))
+        # Only the visible rows get widgets; they are recycled while scrolling
+        scroll = RecycleView(do_scroll_x=False, viewclass=EmojiCell)
+        emoji_scroll_grid = RecycleGridLayout(
+            cols=12,
+            spacing=dp(2),
+            padding=dp(2),
+            default_size=(dp(32), dp(32)),
+            default_size_hint=(None, None),
+            size_hint_y=None
+        )
         emoji_scroll_grid.bind(minimum_height=emoji_scroll_grid.setter('height'))
-        
-        all_emojis = [c for c in emoji.EMOJI_DATA if len(c) == 1 and c not in ['️', '⃣']]
-        
-        for emoji_char in all_emojis:
-            btn = Button(
-                text=emoji_char,
-                font_size='20sp',
-                font_name='EmojiFont' if emoji_font_available else None,
-                size_hint=(None, None),
-                size=(dp(32), dp(32)),
-                on_press=partial(self.choose_emoji, emoji_char)
-            )
-            emoji_scroll_grid.add_widget(btn)
-        
         scroll.add_widget(emoji_scroll_grid)
+        # One data dict per searchable emoji; a search only picks which ones to show
+        self.search_index = get_search_index()
+        self.entries = [{'glyph': emoji_char, 'chooser': self} for emoji_char in self.search_index.emoji]
+        scroll.data = self.entries
+        self.emoji_view = scroll
         main_layout.add_widget(scroll)
         
-        random_btn = Button(
+        random_layout = BoxLayout(size_hint_y=None, height=dp(40), spacing=dp(10))
+        random_layout.add_widget(Button(
             text='Random Emoji',
-            size_hint_y=None,
-            height=dp(40),
             on_press=lambda x: self.choose_emoji(WiFiUtils.get_random_emoji())
-        )
-        main_layout.add_widget(random_btn)
+        ))
+        random_layout.add_widget(Button(
+            text='Random Combo',
+            on_press=lambda x: self.choose_emoji(self.new_combo())
+        ))
+        main_layout.add_widget(random_layout)
         
         self.content = main_layout
     
+    def on_search(self, instance, query):
+        with METRICS.timer('emoji_search'):
+            if query.strip():
+                matches = self.search_index.search(query)
+                data = [self.entries[i] for i in matches]
+                self.all_label.text = f"{len(data)} found:"
+            else:
+                data = self.entries
+                self.all_label.text = "All Emojis:"
+            self.emoji_view.data = data
+            self.emoji_view.scroll_y = 1
+    
+    def new_combo(self):
+        # Skip combos that were already handed out
+        history = App.get_running_app().history
+        return unissued(lambda: WiFiUtils.generate_emoji_ssid(3), history.ssid_issued)
+    
     def choose_emoji(self, emoji_char, *args):
         self.dismiss()
         self.callback(emoji_char)
@@ -207,19 +307,134 @@ class WiFiNamePopup(Popup):
         self.callback(self.name_input.text)
         self.dismiss()
 
+class HistoryRow(Button):
+    entry = ObjectProperty(None, allownone=True)
+    popup = ObjectProperty(None, allownone=True)
+    
+    def __init__(self, **kwargs):
+        kwargs.setdefault('halign', 'left')
+        kwargs.setdefault('valign', 'middle')
+        if emoji_font_available:
+            kwargs.setdefault('font_name', 'EmojiFont')
+        super().__init__(**kwargs)
+        self.bind(size=lambda widget, size: setattr(widget, 'text_size', size))
+    
+    def on_press(self):
+        if self.popup and self.entry:
+            self.popup.restore(self.entry)
+
+class HistoryPopup(Popup):
+    PAGE_SIZE = 100
+    
+    def __init__(self, history, callback, **kwargs):
+        super().__init__(**kwargs)
+        self.title = 'History'
+        self.size_hint = (0.9, 0.9)
+        self.history = history
+        self.callback = callback
+        self.last_id = None
+        
+        layout = BoxLayout(orientation='vertical', spacing=dp(10))
+        
+        self.rows = RecycleView(do_scroll_x=False, viewclass=HistoryRow)
+        row_layout = RecycleBoxLayout(
+            orientation='vertical',
+            default_size=(None, dp(36)),
+            default_size_hint=(1, None),
+            size_hint_y=None
+        )
+        row_layout.bind(minimum_height=row_layout.setter('height'))
+        self.rows.add_widget(row_layout)
+        layout.add_widget(self.rows)
+        
+        btn_layout = BoxLayout(size_hint_y=None, height=dp(40), spacing=dp(10))
+        self.more_btn = Button(text='Load More', on_press=lambda x: self.load_page())
+        btn_layout.add_widget(self.more_btn)
+        btn_layout.add_widget(Button(text='Close', on_press=lambda x: self.dismiss()))
+        layout.add_widget(btn_layout)
+        
+        self.content = layout
+        self.load_page()
+    
+    def load_page(self):
+        # Keyset paging: each page starts below the last id shown, so it stays
+        # an index range scan however deep the history goes
+        entries = self.history.page(before_id=self.last_id, limit=self.PAGE_SIZE)
+        if entries:
+            self.last_id = entries[-1]['id']
+            self.rows.data.extend(
+                {'text': self.describe(entry), 'entry': entry, 'popup': self} for entry in entries
+            )
+        self.more_btn.disabled = len(entries) < self.PAGE_SIZE
+    
+    @staticmethod
+    def describe(entry):
+        created = time.strftime('%Y-%m-%d %H:%M', time.localtime(entry['created']))
+        return f"{created}  {entry['source']:<9}  {entry['ssid']}"
+    
+    def restore(self, entry):
+        self.dismiss()
+        self.callback(entry)
+
+class CapturedRow(Button):
+    wifi_config = ObjectProperty(None, allownone=True)
+    popup = ObjectProperty(None, allownone=True)
+    
+    def __init__(self, **kwargs):
+        if emoji_font_available:
+            kwargs.setdefault('font_name', 'EmojiFont')
+        super().__init__(**kwargs)
+    
+    def on_press(self):
+        if self.popup and self.wifi_config:
+            self.popup.select(self.wifi_config)
+
 class QRScannerPopup(Popup):
-    def __init__(self, callback, **kwargs):
+    def __init__(self, callback, frame_source=None, on_capture=None, **kwargs):
         super().__init__(**kwargs)
         self.title = 'QR Code Scanner'
         self.size_hint = (0.9, 0.9)
         self.callback = callback
+        self.on_capture = on_capture
+        self.frame_source = frame_source
         self.scanning = False
+        self.multi = False
         self.capture = None
+        self.pipeline = None
+        self.decoder = None
+        self.preview_texture = None
+        # Only touched from the decode thread; the UI asks for a reset via the flag
+        self.tracker = SightingTracker(SCAN_CONFIRMATIONS)
+        self.reset_tracker = False
         
         layout = BoxLayout(orientation='vertical', spacing=dp(10))
         
-        self.camera_view = Image(size_hint=(1, 0.8))
-        layout.add_widget(self.camera_view)
+        camera_row = BoxLayout(spacing=dp(10))
+        self.camera_view = Image()
+        camera_row.add_widget(self.camera_view)
+        
+        # Networks found in multi-code mode stream in here while the camera keeps running
+        self.captured_view = RecycleView(do_scroll_x=False, viewclass=CapturedRow,
+                                         size_hint_x=None, width=0, opacity=0)
+        captured_layout = RecycleBoxLayout(
+            orientation='vertical',
+            default_size=(None, dp(36)),
+            default_size_hint=(1, None),
+            size_hint_y=None
+        )
+        captured_layout.bind(minimum_height=captured_layout.setter('height'))
+        self.captured_view.add_widget(captured_layout)
+        camera_row.add_widget(self.captured_view)
+        layout.add_widget(camera_row)
+        
+        self.stats_label = Label(
+            text="",
+            font_size='12sp',
+            size_hint_y=None,
+            height=0,
+            opacity=0
+        )
+        layout.add_widget(self.stats_label)
         
         self.status_label = Label(
             text="Point camera at a WiFi QR code",
@@ -233,26 +448,85 @@ class QRScannerPopup(Popup):
             text='Cancel',
             on_press=self.stop_and_dismiss
         ))
+        btn_layout.add_widget(ToggleButton(
+            text='Multi',
+            size_hint_x=None,
+            width=dp(80),
+            on_press=self.toggle_multi
+        ))
+        btn_layout.add_widget(ToggleButton(
+            text='Stats',
+            size_hint_x=None,
+            width=dp(80),
+            on_press=self.toggle_stats
+        ))
         layout.add_widget(btn_layout)
         
         self.content = layout
     
+    def toggle_multi(self, instance):
+        self.multi = instance.state == 'down'
+        self.captured_view.width = dp(260) if self.multi else 0
+        self.captured_view.opacity = 1 if self.multi else 0
+        self.status_label.text = ("Point camera at WiFi QR codes; tap a network to use it"
+                                  if self.multi else "Point camera at a WiFi QR code")
+        if self.decoder:
+            self.decoder.multi = self.multi
+        self.reset_tracker = True
+    
+    def toggle_stats(self, instance):
+        show = instance.state == 'down'
+        self.stats_label.opacity = 1 if show else 0
+        self.stats_label.height = dp(24) if show else 0
+        Clock.unschedule(self.update_stats)
+        if show:
+            self.update_stats(0)
+            Clock.schedule_interval(self.update_stats, 0.5)
+    
+    def update_stats(self, dt):
+        decode = METRICS.latency('barcode_decode')
+        tracker = self.tracker.stats()
+        self.stats_label.text = (
+            f"preview {METRICS.rate('preview'):.1f} fps | "
+            f"decode {METRICS.rate('decode'):.1f} fps | "
+            f"decode p50 {decode['p50_ms']:.1f} ms p95 {decode['p95_ms']:.1f} ms | "
+            f"tracking {tracker['tracked_payloads']} confirmed {tracker['confirmed']}"
+        )
+    
     def on_open(self):
         self.start_scanning()
     
     def start_scanning(self):
         self.scanning = True
-        self.capture = cv2.VideoCapture(0)
+        # The scanner stack is only imported once the scanner is first opened
+        from scanner_decode import AdaptiveDecoder
+        from scanner_pipeline import ScanPipeline
+        
+        if self.frame_source is None:
+            import cv2
+            self.capture = cv2.VideoCapture(0)
+        else:
+            self.capture = self.frame_source
         if not self.capture.isOpened():
             self.status_label.text = "Error: Could not access camera"
             self.scanning = False
             return
         
+        # Capture and decode run on worker threads; the UI only draws previews
+        self.decoder = AdaptiveDecoder(multi=self.multi)
+        self.pipeline = ScanPipeline(self.capture, self.decoder, self.on_detections)
+        self.pipeline.start()
         Clock.schedule_interval(self.update_camera_view, 1.0/30.0)
     
     def stop_scanning(self):
         self.scanning = False
-        if self.capture and self.capture.isOpened():
+        Clock.unschedule(self.update_camera_view)
+        Clock.unschedule(self.update_stats)
+        if self.pipeline:
+            self.pipeline.stop()
+            self.pipeline = None
+            self.decoder = None
+        elif self.capture and self.capture.isOpened():
             self.capture.release()
         self.capture = None
     
@@ -260,84 +534,127 @@ class QRScannerPopup(Popup):
         self.stop_scanning()
         self.dismiss()
     
-    def parse_wifi_config(self, text):
-        """Parse both standard and Samsung-style WiFi QR codes"""
-        # Standard format: WIFI:S:<SSID>;T:<TYPE>;P:<PASSWORD>;;
-        # Samsung format: WIFI:S:<SSID>;P:<PASSWORD>;T:<TYPE>;H:<true/false>;;
-        
-        # Remove WIFI: prefix if present
-        if text.startswith("WIFI:"):
-            text = text[5:]
-        
-        # Split into components
-        parts = text.split(';')
-        ssid = None
-        password = None
-        security_type = None
-        hidden = False
-        
-        for part in parts:
-            if part.startswith('S:'):
-                ssid = part[2:]
-            elif part.startswith('P:'):
-                password = part[2:]
-            elif part.startswith('T:'):
-                security_type = part[2:]
-            elif part.startswith('H:'):
-                hidden = part[2:].lower() == 'true'
-        
-        if not ssid:
-            raise ValueError("SSID not found in QR code")
-        
-        # Samsung sometimes includes quotes around values
-        if ssid.startswith('"') and ssid.endswith('"'):
-            ssid = ssid[1:-1]
-        if password and password.startswith('"') and password.endswith('"'):
-            password = password[1:-1]
+    def update_camera_view(self, dt):
+        if not self.scanning or not self.pipeline:
+            return
         
-        return {
-            'ssid': ssid,
-            'password': password,
-            'security_type': security_type,
-            'hidden': hidden
-        }
+        frame = self.pipeline.preview.poll()
+        if frame is None:
+            if self.pipeline.error:
+                # Capture gave up after repeated failed reads; say so instead of freezing
+                self.status_label.text = f"Error: {self.pipeline.error}"
+                Clock.unschedule(self.update_camera_view)
+            return
+        try:
+            height, width = frame.array.shape[:2]
+            texture = self.preview_texture
+            if texture is None or texture.size != (width, height):
+                # One texture per resolution, flipped on the GPU side instead of copying rows
+                texture = Texture.create(size=(width, height), colorfmt='bgr')
+                texture.flip_vertical()
+                self.preview_texture = texture
+            with METRICS.timer('texture_upload'):
+                texture.blit_buffer(frame.array.reshape(-1), colorfmt='bgr', bufferfmt='ubyte')
+        finally:
+            frame.release()
+        METRICS.tick('preview')
+        self.camera_view.texture = texture
+        self.camera_view.canvas.ask_update()
     
-    def update_camera_view(self, dt):
-        if not self.scanning or not self.capture or not self.capture.isOpened():
+    def on_detections(self, results):
+        # Runs on the decode thread: repeated sightings of a code are absorbed
+        # here, so the UI only hears about each network once
+        if self.reset_tracker:
+            self.reset_tracker = False
+            self.tracker.reset()
+        confirmed = self.tracker.update(results)
+        if confirmed:
+            self.on_confirmed([wifi_config for _, wifi_config, _ in confirmed])
+    
+    @mainthread
+    def on_confirmed(self, wifi_configs):
+        if not self.scanning:
             return
-            
-        ret, frame = self.capture.read()
-        if ret:
-            # Convert to texture for display
-            buf = cv2.flip(frame, 0).tobytes()
-            texture = Texture.create(size=(frame.shape[1], frame.shape[0]), colorfmt='bgr')
-            texture.blit_buffer(buf, colorfmt='bgr', bufferfmt='ubyte')
-            self.camera_view.texture = texture
-            
-            # Try to decode QR code
-            results = zxingcpp.read_barcodes(frame)
-            if results:
-                try:
-                    wifi_config = self.parse_wifi_config(results[0].text)
-                    self.stop_scanning()
-                    self.callback(wifi_config)
-                    self.dismiss()
-                except Exception as e:
-                    self.status_label.text = f"Error: {str(e)}"
-                    Clock.schedule_once(lambda dt: setattr(self.status_label, 'text', 
-                                      "Point camera at a WiFi QR code"), 2)
+        if not self.multi:
+            self.select(wifi_configs[0], recorded=False)
+            return
+        captured = [row['wifi_config'] for row in self.captured_view.data]
+        for wifi_config in wifi_configs:
+            # Toggling Multi resets the tracker, so networks already listed are confirmed again
+            if wifi_config in captured:
+                continue
+            captured.append(wifi_config)
+            self.captured_view.data.append({
+                'text': f"{wifi_config['ssid']} ({wifi_config['security_type'] or 'open'})",
+                'wifi_config': wifi_config,
+                'popup': self,
+            })
+            if self.on_capture:
+                self.on_capture(wifi_config)
+        count = len(self.captured_view.data)
+        self.status_label.text = f"Captured {count} network{'s' if count != 1 else ''}; tap one to use it"
+    
+    def select(self, wifi_config, recorded=True):
+        self.stop_scanning()
+        self.callback(wifi_config, recorded=recorded)
+        self.dismiss()
     
     def on_dismiss(self):
         self.stop_scanning()
 
+class RenderScheduler:
+    """Coalesce render requests into at most one render per frame"""
+    
+    def __init__(self, render):
+        self.render = render
+        self.requested = 0
+        self.performed = 0
+        self.new_password = False
+        self._trigger = Clock.create_trigger(self._flush)
+    
+    def request(self, new_password=False):
+        # Requests made before the next frame are merged into a single render
+        self.requested += 1
+        self.new_password = self.new_password or new_password
+        self._trigger()
+    
+    def _flush(self, dt):
+        new_password, self.new_password = self.new_password, False
+        self.performed += 1
+        self.render(new_password)
+    
+    @property
+    def dropped(self):
+        return self.requested - self.performed
+    
+    def stats(self):
+        return {
+            'requested': self.requested,
+            'performed': self.performed,
+            'dropped': self.dropped
+        }
+
 class WiFiQRApp(App):
-    ssid = StringProperty(WiFiUtils.get_random_emoji())
-    password = StringProperty(WiFiUtils.generate_wpa3_password(62))
+    ssid = StringProperty(COMMON_EMOJIS[0])
+    password = StringProperty('')
     qr_size = NumericProperty(inch(3))
     password_length = NumericProperty(62)
+    error_correction = StringProperty(qr_render.DEFAULT_ERROR_CORRECTION)
+    quiet_zone = NumericProperty(qr_render.DEFAULT_BORDER)
     qr_img = ObjectProperty(None)
+    emoji_chooser = ObjectProperty(None, allownone=True)
+    qr_texture = ObjectProperty(None, allownone=True)
     
     def build(self):
+        # The full emoji catalog is only loaded when the chooser or Random needs it
+        self.history = HistoryStore()
+        self.recorded = None
+        self.ssid = WiFiUtils.get_random_common_emoji()
+        self.password = self.new_password()
+        self.render_scheduler = RenderScheduler(self.render)
+        self.credential_pool = CredentialPool(self.make_credential, CREDENTIAL_POOL_SIZE)
+        self.rotation_interval = 0
+        
         # Main layout
         main_layout = BoxLayout(orientation='vertical', spacing=dp(10), padding=dp(10))
         
@@ -355,15 +672,11 @@ class WiFiQRApp(App):
                                 height=dp(150),
                                 spacing=dp(5))
         
-        self.ssid_display = Label(
+        self.ssid_display = GlyphLabel(
             text=self.ssid,
-            font_size='80sp',
-            font_name='EmojiFont' if emoji_font_available else None,
-            halign='center',
-            valign='middle',
+            glyph_size=sp(80),
             size_hint_y=None,
-            height=dp(100),
-            text_size=(None, None)
+            height=dp(100)
         )
         
         emoji_buttons = BoxLayout(orientation='horizontal',
@@ -466,6 +779,38 @@ class WiFiQRApp(App):
         length_container.add_widget(copy_pw_btn)
         control_layout.add_widget(length_container)
         
+        # Encoding options: lower error correction and a slimmer quiet zone give
+        # a smaller code that scans from further away
+        encoding_box = BoxLayout(orientation='vertical',
+                                 size_hint_y=None,
+                                 height=dp(120),
+                                 spacing=dp(5))
+        options_row = BoxLayout(orientation='horizontal',
+                                size_hint_y=None,
+                                height=dp(40),
+                                spacing=dp(5))
+        options_row.add_widget(Label(text="EC:", size_hint_x=None, width=dp(30)))
+        ec_spinner = Spinner(text=self.error_correction, values=list(qr_render.ERROR_CORRECTION_LEVELS))
+        ec_spinner.bind(text=self.on_error_correction)
+        options_row.add_widget(ec_spinner)
+        options_row.add_widget(Label(text="Border:", size_hint_x=None, width=dp(55)))
+        border_spinner = Spinner(text=str(self.quiet_zone), values=['1', '2', '4'])
+        border_spinner.bind(text=self.on_quiet_zone)
+        options_row.add_widget(border_spinner)
+        encoding_box.add_widget(options_row)
+        self.qr_info_label = Label(text="", font_size='12sp', size_hint_y=None, height=dp(30))
+        encoding_box.add_widget(self.qr_info_label)
+        rotation_row = BoxLayout(orientation='horizontal',
+                                 size_hint_y=None,
+                                 height=dp(40),
+                                 spacing=dp(5))
+        rotation_row.add_widget(Label(text="Rotate:", size_hint_x=None, width=dp(55)))
+        rotation_spinner = Spinner(text='Off', values=list(ROTATION_INTERVALS))
+        rotation_spinner.bind(text=self.on_rotation)
+        rotation_row.add_widget(rotation_spinner)
+        encoding_box.add_widget(rotation_row)
+        control_layout.add_widget(encoding_box)
+        
         content_layout.add_widget(control_layout)
         main_layout.add_widget(content_layout)
         
@@ -483,6 +828,10 @@ class WiFiQRApp(App):
             text="Scan QR Code",
             on_press=self.show_scanner
         ))
+        btn_row.add_widget(Button(
+            text="History",
+            on_press=self.show_history
+        ))
         btn_row.add_widget(Button(
             text="Quit",
             on_press=self.quit_app
@@ -492,28 +841,53 @@ class WiFiQRApp(App):
         
         # Initial setup
         self.update_qr_code()
+        self.record_network()
+        self.credential_pool.prepare(self.pool_key())
         return main_layout
     
     def show_emoji_chooser(self, instance):
-        popup = EmojiChooser(self.set_emoji)
-        popup.open()
+        # The chooser is built once and reused between openings
+        if self.emoji_chooser is None:
+            self.emoji_chooser = EmojiChooser(self.set_emoji)
+        self.emoji_chooser.open()
     
     def show_name_popup(self, instance):
         popup = WiFiNamePopup(self.ssid, self.set_wifi_name)
         popup.open()
     
     def show_scanner(self, instance):
-        popup = QRScannerPopup(self.handle_scanned_qr)
+        popup = QRScannerPopup(self.handle_scanned_qr, on_capture=self.record_scanned)
         popup.open()
     
-    def handle_scanned_qr(self, wifi_config):
+    def show_history(self, instance):
+        popup = HistoryPopup(self.history, self.restore_history_entry)
+        popup.open()
+    
+    def restore_history_entry(self, entry):
+        self.ssid = entry['ssid']
+        self.password = entry['password'] or ""
+        self.ssid_display.text = self.ssid
+        self.pw_display.text = self.password
+        # Already in the history; don't record it a second time
+        self.recorded = (self.ssid, self.password)
+        self.render_scheduler.request()
+    
+    def record_scanned(self, wifi_config):
+        self.history.record(wifi_config['ssid'], wifi_config['password'],
+                            wifi_config['security_type'], wifi_config['hidden'], source='scanned')
+    
+    def handle_scanned_qr(self, wifi_config, recorded=False):
         try:
+            # Multi-code scans record every network as it is captured
+            if not recorded:
+                self.record_scanned(wifi_config)
+            self.recorded = (wifi_config['ssid'], wifi_config['password'] or "")
             # Update the UI with scanned values
             self.ssid = wifi_config['ssid']
             self.password = wifi_config['password'] if wifi_config['password'] else ""
             self.ssid_display.text = wifi_config['ssid']
             self.pw_display.text = wifi_config['password'] if wifi_config['password'] else ""
-            self.update_qr_code()  # Generate new QR code with scanned data
+            self.render_scheduler.request()  # Generate new QR code with scanned data
             
             # Show success message
             success_popup = Popup(title='Success',
@@ -530,72 +904,163 @@ class WiFiQRApp(App):
     def set_emoji(self, emoji_char):
         self.ssid = emoji_char
         self.ssid_display.text = emoji_char
-        self.update_qr_code()
+        self.render_scheduler.request()
     
     def set_wifi_name(self, name):
         if name.strip():
             self.ssid = name
             self.ssid_display.text = name
-            self.update_qr_code()
+            self.render_scheduler.request()
     
     def on_start(self):
         self.root_window.bind(size=self.on_window_resize)
+        self.metrics_dumper = None
+        if METRICS_PATH:
+            self.metrics_dumper = MetricsDumper(METRICS_PATH, METRICS, METRICS_INTERVAL)
+            self.metrics_dumper.start()
+    
+    def on_stop(self):
+        Clock.unschedule(self.rotate)
+        # The pool checks new passwords against the history, so it stops first
+        self.credential_pool.close()
+        if self.metrics_dumper:
+            self.metrics_dumper.stop()
+        # Commits whatever the writer thread still has queued
+        self.history.close()
     
     def on_window_resize(self, window, size):
         new_size = min(size[0] * 0.6 - dp(40), size[1] - dp(150))
         self.qr_size = max(new_size, inch(3))
-        self.update_qr_code()
+        self.render_scheduler.request()
     
     def on_length_change(self, instance, value):
         length = int(value)
-        self.password_length = length
-        self.length_input.text = str(length)
-        self.password = WiFiUtils.generate_wpa3_password(length)
-        self.pw_display.text = self.password
-        self.update_qr_code()
+        # Leave a partially typed value alone if it already maps to this length
+        if self.parse_length(self.length_input.text) != length:
+            self.length_input.text = str(length)
+        self.set_password_length(length)
     
     def on_length_input(self, instance, value):
+        length = self.parse_length(value)
+        if length is not None:
+            self.set_password_length(length)
+    
+    @staticmethod
+    def parse_length(text):
         try:
-            length = int(value) if value else 8
-            length = max(8, min(63, length))
-            self.password_length = length
+            length = int(text) if text else 8
+        except ValueError:
+            return None
+        return max(8, min(63, length))
+    
+    def set_password_length(self, length):
+        # The slider and text input update each other; only a real change renders
+        if length == self.password_length:
+            return
+        self.password_length = length
+        if int(self.length_slider.value) != length:
             self.length_slider.value = length
-            self.password = WiFiUtils.generate_wpa3_password(length)
+        self.render_scheduler.request(new_password=True)
+    
+    def on_error_correction(self, instance, level):
+        self.error_correction = level
+        self.render_scheduler.request()
+    
+    def on_quiet_zone(self, instance, border):
+        self.quiet_zone = int(border)
+        self.render_scheduler.request()
+    
+    def on_rotation(self, instance, choice):
+        self.rotation_interval = ROTATION_INTERVALS[choice]
+        Clock.unschedule(self.rotate)
+        if self.rotation_interval:
+            Clock.schedule_interval(self.rotate, self.rotation_interval)
+    
+    def rotate(self, dt):
+        self.render_scheduler.request(new_password=True)
+    
+    def render(self, new_password):
+        prepared = None
+        if new_password:
+            with METRICS.timer('password_generation'):
+                # A pooled entry comes with its QR code already rasterized
+                prepared = self.credential_pool.take(self.pool_key())
+                self.password = prepared[0] if prepared else self.new_password()
             self.pw_display.text = self.password
-            self.update_qr_code()
-        except ValueError:
-            pass
+        self.update_qr_code(prepared)
+        self.record_network()
+        self.credential_pool.prepare(self.pool_key())
+    
+    def new_password(self, length=None):
+        return unissued(lambda: WiFiUtils.generate_wpa3_password(length or self.password_length),
+                        self.history.password_issued)
+    
+    def qr_pixels(self):
+        return int(self.qr_size * (96 / inch(1)))
+    
+    def pool_key(self):
+        # Everything a pooled entry depends on; a change empties the pool
+        return (self.ssid, self.password_length, self.qr_pixels(), self.error_correction, self.quiet_zone)
+    
+    def make_credential(self, key):
+        """Make one pool entry, (password, matrix, rgba, side); runs on the pool thread"""
+        ssid, length, size_pixels, error_correction, border = key
+        password = self.new_password(length)
+        matrix = qr_render.qr_matrix(ssid, password, 'WPA', False, error_correction, border)
+        rgba, side = qr_render.rasterize_rgba(matrix, size_pixels)
+        return password, matrix, rgba, side
     
-    def update_qr_code(self):
+    def record_network(self):
+        # Resizes re-render the same network; only a new one is written
+        network = (self.ssid, self.password)
+        if network != self.recorded:
+            self.recorded = network
+            self.history.record(self.ssid, self.password)
+    
+    def update_qr_code(self, prepared=None):
+        with METRICS.timer('qr_render'):
+            self._update_qr_code(prepared)
+    
+    def _update_qr_code(self, prepared=None):
         try:
-            size_pixels = int(self.qr_size * (96 / inch(1)))
-            img_bytes = WiFiUtils.generate_qr_code(self.ssid, self.password, size_pixels)
-            pil_img = PILImage.open(img_bytes)
-            if pil_img.mode != 'RGBA':
-                pil_img = pil_img.convert('RGBA')
-            texture = Texture.create(size=pil_img.size, colorfmt='rgba')
-            texture.blit_buffer(pil_img.tobytes(), colorfmt='rgba', bufferfmt='ubyte')
+            if prepared:
+                _, matrix, rgba, side = prepared
+            else:
+                # The matrix is cached per network, so a resize only re-rasterizes it
+                matrix = qr_render.qr_matrix(self.ssid, self.password, 'WPA', False,
+                                             self.error_correction, self.quiet_zone)
+                rgba, side = qr_render.rasterize_rgba(matrix, self.qr_pixels())
+            info = qr_render.describe_matrix(matrix, self.quiet_zone)
+            self.qr_info_label.text = f"Version {info['version']}, {info['modules']}x{info['modules']} modules"
+            size = (side, side)
+            texture = self.qr_texture
+            if texture is None or texture.size != size:
+                texture = Texture.create(size=size, colorfmt='rgba')
+                texture.mag_filter = 'nearest'
+                texture.min_filter = 'nearest'
+                texture.flip_vertical()
+                self.qr_texture = texture
+            texture.blit_buffer(rgba, colorfmt='rgba', bufferfmt='ubyte')
             self.qr_img.texture = texture
+            self.qr_img.canvas.ask_update()
             self.qr_img.size = (self.qr_size, self.qr_size)
         except Exception as e:
-            print(f"Error updating QR code: {e}")
+            log.exception("Error updating QR code: %s", e)
     
     def copy_ssid(self, instance):
         try:
             Clipboard.copy(self.ssid)
         except Exception as e:
-            print(f"Error copying SSID: {e}")
+            log.exception("Error copying SSID: %s", e)
     
     def copy_password(self, instance):
         try:
             Clipboard.copy(self.password)
         except Exception as e:
-            print(f"Error copying password: {e}")
+            log.exception("Error copying password: %s", e)
     
     def generate_new(self, instance):
-        self.password = WiFiUtils.generate_wpa3_password(self.password_length)
-        self.pw_display.text = self.password
-        self.update_qr_code()
+        self.render_scheduler.request(new_password=True)
     
     def quit_app(self, instance):
         App.get_running_app().stop()
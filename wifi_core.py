@@ -0,0 +1,72 @@
+import functools
+import io
+import os
+import secrets
+import threading
+
+import credentials
+
+# Common emojis to choose from
+COMMON_EMOJIS = ["📶", "🏠", "💻", "📱", "🔒", "🌐", "🚀", "✨", "🔑", "🛡️"]
+
+
+def data_dir():
+    """Directory for the history database and caches (override with EMOJI_WIFI_HOME)"""
+    return os.environ.get('EMOJI_WIFI_HOME') or os.path.join(os.path.expanduser('~'), '.emoji-wifi')
+
+
+def lazy_singleton(factory):
+    """Turn a zero-argument factory into a getter that calls it once, on first use.
+
+    Concurrent first callers wait for the one build instead of starting their own.
+    """
+    lock = threading.Lock()
+    instance = []
+
+    @functools.wraps(factory)
+    def get():
+        if not instance:
+            with lock:
+                if not instance:
+                    instance.append(factory())
+        return instance[0]
+    return get
+
+
+class WiFiUtils:
+    # Heavy dependencies (the emoji table, qrcode, PIL) are imported on first use
+
+    @staticmethod
+    def get_random_emoji():
+        from emoji_catalog import get_catalog
+        return get_catalog().random_emoji()
+
+    @staticmethod
+    def generate_emoji_ssid(count=3, budget=32):
+        from ssid_generator import get_ssid_index
+        return get_ssid_index().generate(count, budget)
+
+    @staticmethod
+    def get_random_common_emoji():
+        return secrets.choice(COMMON_EMOJIS)
+
+    @staticmethod
+    def generate_wpa3_password(length=62):
+        return credentials.generate_wpa3_password(length)
+
+    @staticmethod
+    def generate_wpa3_passwords(count, length=62):
+        return credentials.generate_wpa3_passwords(count, length)
+
+    @staticmethod
+    def generate_qr_code(ssid, password, size_pixels, error_correction='M', border=4):
+        from PIL import Image as PILImage
+        from qr_render import make_qr_code
+
+        qr_code = make_qr_code(ssid, password, 'WPA', False, error_correction, border)
+        img = qr_code.make_image()
+        img = img.resize((size_pixels, size_pixels), PILImage.Resampling.LANCZOS)
+        img_bytes = io.BytesIO()
+        img.save(img_bytes, format='PNG')
+        img_bytes.seek(0)
+        return img_bytes
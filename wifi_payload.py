@@ -0,0 +1,135 @@
+# Standard format: WIFI:S:<SSID>;T:<TYPE>;P:<PASSWORD>;;
+# Samsung format: WIFI:S:<SSID>;P:<PASSWORD>;T:<TYPE>;H:<true/false>;;
+#
+# Inside a value, \ ; , : and " are escaped with a backslash. Samsung devices
+# may also wrap the SSID or password in double quotes, which are not part of it.
+
+SPECIAL_CHARS = '\\;,:"'
+_ESCAPE_TABLE = str.maketrans({c: '\\' + c for c in SPECIAL_CHARS})
+
+
+def escape_value(value):
+    return value.translate(_ESCAPE_TABLE)
+
+
+def encode_wifi_payload(ssid, password=None, authentication_type='WPA', hidden=False):
+    """Build a WIFI: payload with every special character escaped"""
+    if not ssid:
+        raise ValueError("SSID must not be empty")
+    authentication_type = authentication_type or 'nopass'
+    payload = 'WIFI:T:' + authentication_type + ';S:' + escape_value(ssid) + ';'
+    if password and authentication_type != 'nopass':
+        payload += 'P:' + escape_value(password) + ';'
+    if hidden:
+        payload += 'H:true;'
+    return payload + ';'
+
+
+def _unescape(segment):
+    if '\\' not in segment:
+        return segment
+    value = ''
+    i = 0
+    while True:
+        backslash = segment.find('\\', i)
+        if backslash < 0:
+            return value + segment[i:]
+        value += segment[i:backslash] + segment[backslash + 1:backslash + 2]
+        i = backslash + 2
+
+
+def _read_value(text, i, n):
+    """Read one value starting at i; returns (value, index after its ';')"""
+    if i < n and text[i] == '"':
+        # Some Samsung payloads quote a value and leave ';' inside it unescaped.
+        # It ends at the first unescaped '"' followed by ';' or the end of the text.
+        close = -1
+        j = i + 1
+        while True:
+            quote = text.find('"', j)
+            if quote < 0:
+                break
+            backslash = text.find('\\', j, quote)
+            if backslash >= 0:
+                # Skip the escape pair, which may be an escaped quote or backslash
+                j = backslash + 2
+                continue
+            if quote + 1 == n or text[quote + 1] == ';':
+                close = quote
+                break
+            j = quote + 1
+        if close > 0:
+            return _unescape(text[i + 1:close]), close + 2
+
+    value = ''
+    while True:
+        semi = text.find(';', i)
+        end = n if semi < 0 else semi
+        backslash = text.find('\\', i, end)
+        if backslash < 0:
+            value += text[i:end]
+            break
+        value += text[i:backslash]
+        if backslash + 1 < n:
+            # The escaped character may itself be the ';' found above
+            value += text[backslash + 1]
+        i = backslash + 2
+    return value, end + 1
+
+
+def parse_wifi_config(text):
+    """Parse both standard and Samsung-style WiFi QR codes in a single pass"""
+    n = len(text)
+    i = 5 if text[:5].upper() == 'WIFI:' else 0
+    ssid = None
+    password = None
+    security_type = None
+    hidden = False
+
+    while i < n:
+        if text[i] == ';':
+            i += 1
+            continue
+        colon = text.find(':', i)
+        if colon < 0:
+            break
+        stray = text.find(';', i, colon)
+        if stray >= 0:
+            # A field without a key; skip it
+            i = stray + 1
+            continue
+        key = text[i:colon].upper()
+        value, i = _read_value(text, colon + 1, n)
+        if key == 'S':
+            ssid = value
+        elif key == 'P':
+            password = value
+        elif key == 'T':
+            security_type = value
+        elif key == 'H':
+            hidden = value.lower() == 'true'
+
+    if not ssid:
+        raise ValueError("SSID not found in QR code")
+
+    return {
+        'ssid': ssid,
+        'password': password,
+        'security_type': security_type,
+        'hidden': hidden
+    }
+
+
+def parse_wifi_configs(payloads, skip_invalid=True):
+    """Parse many payloads; invalid ones are skipped, or raise if skip_invalid is False"""
+    parse = parse_wifi_config
+    if not skip_invalid:
+        return [parse(text) for text in payloads]
+    configs = []
+    append = configs.append
+    for text in payloads:
+        try:
+            append(parse(text))
+        except ValueError:
+            pass
+    return configs